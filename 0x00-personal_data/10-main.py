@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+
+redact_csv_file = __import__('redact_csv').redact_csv_file
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+with tempfile.TemporaryDirectory() as tmp:
+    src_path = os.path.join(tmp, "users.csv")
+    with open(src_path, "w", newline='') as src:
+        src.write("name,email,phone,ssn,password,ip,last_login\n"
+                  "Alice,alice@x.io,555,123,pw,1.2.3.4,2019-11-14\n"
+                  "\n"
+                  "Bob,bob@x.io\n"
+                  "\"Carol\nJones\",\"c \"\"q\"\"\",555,1,pw,5.6.7.8,x\n")
+    with open(src_path, "rb") as src:
+        print(src.read())
+    dst = io.BytesIO()
+    print(redact_csv_file(src_path, dst, workers=2, shard_size=16))
+    print(dst.getvalue())
+    rows = list(csv.reader(io.StringIO(dst.getvalue().decode())))
+    print(rows[1][:5] == ["***"] * 5, rows[1][5:], rows[2], rows[3])
+
+    with open(src_path, "w", newline='') as src:
+        src.write("name,email,phone,ssn,password,ip,last_login\n")
+        for i in range(count):
+            src.write("User {0},user{0}@example.com,(473) 401-4253,"
+                      "261-72-6780,pw{0},60ed:c396:2ff:244,"
+                      "2019-11-14 06:14:24\n".format(i))
+    size = os.path.getsize(src_path)
+    workers = 1
+    while workers <= os.cpu_count():
+        with open(os.devnull, "wb") as dst:
+            start = time.perf_counter()
+            redact_csv_file(src_path, dst, workers=workers)
+            elapsed = time.perf_counter() - start
+        print("{:>2} workers: {:.1f} MB/s".format(
+            workers, size / elapsed / 1e6))
+        workers *= 2
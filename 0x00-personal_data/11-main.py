@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+
+import itertools
+import threading
+import time
+
+ConnectionPool = __import__('filtered_logger').ConnectionPool
+
+
+class FakeConnection:
+    """ In-process stand-in for a MySQL connection """
+    ids = itertools.count(1)
+
+    def __init__(self):
+        """ Open """
+        self.id = next(self.ids)
+        self.alive = True
+        self.closed = False
+
+    def is_connected(self) -> bool:
+        """ Ping """
+        return self.alive
+
+    def close(self) -> None:
+        """ Close """
+        self.closed = True
+
+
+pool = ConnectionPool(size=2, connect=FakeConnection, timeout=0.2)
+
+# Reuse: a returned connection is lent again
+with pool.connection() as conn:
+    first = conn
+with pool.connection() as conn:
+    print("reused:", conn is first)
+
+# Dead connection: closed and replaced by a new one
+first.alive = False
+with pool.connection() as conn:
+    print("replaced:", conn is not first, first.closed, conn.id)
+
+# Wait: a second borrower waits for a connection to come back
+held = threading.Event()
+release = threading.Event()
+
+
+def hold():
+    """ Keep a connection until released """
+    with pool.connection():
+        held.set()
+        release.wait()
+
+
+holders = [threading.Thread(target=hold) for _ in range(2)]
+for thread in holders:
+    thread.start()
+    held.wait()
+    held.clear()
+threading.Timer(0.05, release.set).start()
+start = time.perf_counter()
+with pool.connection() as conn:
+    print("waited: {:.2f}s".format(time.perf_counter() - start))
+for thread in holders:
+    thread.join()
+
+# Timeout: all connections busy past the pool timeout
+release.clear()
+holders = [threading.Thread(target=hold) for _ in range(2)]
+for thread in holders:
+    thread.start()
+    held.wait()
+    held.clear()
+try:
+    with pool.connection():
+        pass
+except TimeoutError as e:
+    print("timed out:", e)
+release.set()
+for thread in holders:
+    thread.join()
+
+stats = pool.stats()
+print(stats)
+print("avg_wait over waits:",
+      stats["avg_wait"] == stats["total_wait"] / stats["waits"])
+pool.close()
+print(pool.stats()["open"])
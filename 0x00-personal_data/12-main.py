@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+
+import logging
+import queue
+import threading
+
+filtered_logger = __import__('filtered_logger')
+BoundedQueueHandler = filtered_logger.BoundedQueueHandler
+get_logger = filtered_logger.get_logger
+
+THREADS = 8
+RECORDS = 1000
+record = logging.LogRecord("user_data", logging.INFO, None, None,
+                           "name=Bob;email=bob@dylan.com;", None, None)
+
+
+def flood(handler: BoundedQueueHandler) -> None:
+    """ Queue RECORDS records from each of THREADS threads """
+    threads = [threading.Thread(
+        target=lambda: [handler.handle(record) for _ in range(RECORDS)])
+        for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+for overflow in ("drop", "count"):
+    handler = BoundedQueueHandler(queue.Queue(10), overflow)
+    flood(handler)
+    print("{}: {} queued, {} dropped".format(
+        overflow, handler.queue.qsize(), handler.dropped))
+
+handler = BoundedQueueHandler(queue.Queue(1), "block")
+handler.handle(record)
+blocked = threading.Thread(target=handler.handle, args=(record,))
+blocked.start()
+blocked.join(0.2)
+print("block: waiting on a full queue", blocked.is_alive())
+handler.queue.get()
+blocked.join()
+print("block: queued once there is room", handler.queue.qsize())
+
+logger = get_logger()
+print(get_logger() is logger, len(logger.handlers))
+get_logger(asynchronous=True, queue_size=5, overflow="count")
+handler = logger.handlers[0]
+print(len(logger.handlers), type(handler).__name__, handler.queue.maxsize,
+      handler.overflow)
+logger.info("name=Bob;email=bob@dylan.com;ssn=000-123-0000;")
+get_logger()
+print(len(logger.handlers), type(logger.handlers[0]).__name__)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+
+import os
+import sys
+import time
+
+encrypt_password = __import__('encrypt_password')
+hash_passwords = encrypt_password.hash_passwords
+verify_many = encrypt_password.verify_many
+is_valid = encrypt_password.is_valid
+
+if __name__ == "__main__":
+    os.environ.setdefault("BCRYPT_ROUNDS", "8")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    passwords = ["password{}".format(i) for i in range(count)]
+
+    start = time.perf_counter()
+    hashes = list(hash_passwords(iter(passwords), workers=2, chunk_size=7))
+    elapsed = time.perf_counter() - start
+    print("hash_passwords: {} passwords in {:.2f}s".format(count, elapsed))
+    print("in input order:", all(is_valid(hashed, password) for hashed,
+                                 password in zip(hashes, passwords)))
+
+    guesses = [password if i % 3 else "wrong"
+               for i, password in enumerate(passwords)]
+    start = time.perf_counter()
+    results = list(verify_many(zip(hashes, guesses), workers=2,
+                               chunk_size=7))
+    elapsed = time.perf_counter() - start
+    print("verify_many: {} checks in {:.2f}s".format(count, elapsed))
+    print("in input order:", results == [bool(i % 3) for i in range(count)])
+
+    start = time.perf_counter()
+    for hashed, password in zip(hashes, guesses):
+        is_valid(hashed, password)
+    elapsed = time.perf_counter() - start
+    print("is_valid one by one: {} checks in {:.2f}s".format(count, elapsed))
+    print("empty input:", list(hash_passwords([])), list(verify_many([])))
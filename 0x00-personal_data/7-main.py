@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+
+import csv
+import io
+import sqlite3
+
+export_users = __import__('filtered_logger').export_users
+
+db = sqlite3.connect(":memory:")
+with open("user_data.csv") as f:
+    reader = csv.reader(f)
+    columns = next(reader)
+    db.execute("CREATE TABLE users ({});".format(", ".join(columns)))
+    db.executemany("INSERT INTO users VALUES ({});".format(
+        ", ".join("?" * len(columns))), reader)
+
+sink = io.StringIO()
+print(export_users(db, sink, batch_size=5))
+print(sink.getvalue().splitlines()[0])
+db.close()
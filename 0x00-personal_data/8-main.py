@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+
+import os
+import sys
+import time
+
+redact_lines = __import__('filtered_logger').redact_lines
+
+
+class NullSink:
+    """ Discards the redacted output """
+
+    def write(self, data: str) -> int:
+        """ Drop data """
+        return len(data)
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+template = ("[HOLBERTON] user_data INFO 2019-11-14 06:14:24,000: "
+            "name=User {0}; email=user{0}@example.com; "
+            "phone=(473) 401-4253; ssn=261-72-6780; password=pw{0}; "
+            "ip=60ed:c396:2ff:244:bbd0:9208:26f2:93ea; "
+            "last_login=2019-11-14 06:14:24; user_agent=Mozilla/5.0\n")
+lines = [template.format(i) for i in range(count)]
+
+workers = 1
+while workers <= os.cpu_count():
+    start = time.perf_counter()
+    redact_lines(lines, NullSink(), workers=workers, chunk_size=20000)
+    elapsed = time.perf_counter() - start
+    print("{:>2} workers: {:.0f} lines/s".format(workers, count / elapsed))
+    workers *= 2
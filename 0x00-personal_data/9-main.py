@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+
+import logging
+import sys
+import time
+
+filtered_logger = __import__('filtered_logger')
+RedactingFormatter = filtered_logger.RedactingFormatter
+PII_FIELDS = filtered_logger.PII_FIELDS
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+row = {"name": "Marlene Wood", "email": "hwestiii@att.net",
+       "phone": "(473) 401-4253", "ssn": "261-72-6780", "password": "K5?BMNv",
+       "ip": "60ed:c396:2ff:244:bbd0:9208:26f2:93ea",
+       "last_login": "2019-11-14 06:14:24",
+       "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+formatter = RedactingFormatter(fields=PII_FIELDS)
+
+
+def string_path() -> str:
+    """ Build a key=value message, then redact it with regexes """
+    message = "; ".join([f"{key}={value}" for key, value in row.items()])
+    return formatter.format(logging.LogRecord(
+        "user_data", logging.INFO, None, None, message, None, None))
+
+
+def structured_path() -> str:
+    """ Redact the row by key while serializing it """
+    return formatter.format(logging.LogRecord(
+        "user_data", logging.INFO, None, None, row, None, None))
+
+
+print(structured_path())
+for func in (string_path, structured_path):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - start
+    print("{}: {:.2f} us/record".format(
+        func.__name__, elapsed / count * 1e6))
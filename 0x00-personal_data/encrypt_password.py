@@ -1,8 +1,79 @@
 #!/usr/bin/env python3
 """Pasword encryption"""
 
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Tuple
+
 import bcrypt
 
+DEFAULT_ROUNDS = 12
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+CALIBRATION_ROUNDS = 8
+
+
+def calibrate_rounds(target_ms: float) -> int:
+    """
+    Find the highest bcrypt cost whose hash time fits a latency target.
+
+    Each extra round doubles the work, so one timed hash at a low cost is
+    enough to extrapolate.
+
+    Args:
+        target_ms (float): The target hashing time in milliseconds.
+
+    Returns:
+        int: The bcrypt cost (log2 rounds).
+    Raises:
+        ValueError: If the target is not a positive number.
+    """
+    if not (target_ms > 0 and math.isfinite(target_ms)):
+        raise ValueError("BCRYPT_TARGET_MS must be a positive number of "
+                         "milliseconds, got {}".format(target_ms))
+    salt = bcrypt.gensalt(CALIBRATION_ROUNDS)
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration", salt)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    ratio = target_ms / elapsed_ms
+    rounds = CALIBRATION_ROUNDS + math.floor(math.log2(ratio))
+    return max(MIN_ROUNDS, min(MAX_ROUNDS, rounds))
+
+
+@lru_cache(maxsize=1)
+def get_rounds() -> int:
+    """
+    Return the bcrypt cost of the hashing policy.
+
+    BCRYPT_ROUNDS sets it explicitly; otherwise BCRYPT_TARGET_MS calibrates
+    it on this machine, once per process; otherwise bcrypt's default.
+
+    Returns:
+        int: The bcrypt cost (log2 rounds).
+    Raises:
+        ValueError: If BCRYPT_ROUNDS is not an integer bcrypt accepts, or
+            BCRYPT_TARGET_MS is not a positive number.
+    """
+    rounds = os.getenv('BCRYPT_ROUNDS')
+    if rounds:
+        try:
+            cost = int(rounds)
+        except ValueError:
+            cost = None
+        if cost is None or not MIN_ROUNDS <= cost <= MAX_ROUNDS:
+            raise ValueError("BCRYPT_ROUNDS must be an integer from {} to {}, "
+                             "got {}".format(MIN_ROUNDS, MAX_ROUNDS, rounds))
+        return cost
+    target_ms = os.getenv('BCRYPT_TARGET_MS')
+    if target_ms:
+        return calibrate_rounds(float(target_ms))
+    return DEFAULT_ROUNDS
+
 
 def hash_password(password: str) -> bytes:
     """
@@ -14,7 +85,7 @@ def hash_password(password: str) -> bytes:
     Returns:
         bytes: The hashed password.
     """
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(get_rounds())
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed
 
@@ -31,3 +102,91 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
         bool: True if the password matches the hashed password, else False.
     """
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+
+
+def needs_rehash(hashed_password: bytes) -> bool:
+    """
+    Check if a hash was made with a cost other than the current policy.
+
+    Callers rehash the password after a successful is_valid when this is
+    True, migrating stored hashes as users log in.
+
+    Args:
+        hashed_password (bytes): The hashed password ($2b$<cost>$...).
+
+    Returns:
+        bool: True if the hash should be replaced, else False.
+    """
+    try:
+        return int(hashed_password.split(b'$')[2]) != get_rounds()
+    except (IndexError, ValueError):
+        return True
+
+
+def _hash_chunk(passwords: List[str], rounds: int) -> List[bytes]:
+    """Hash a chunk of passwords in a pool worker."""
+    return [bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+            for password in passwords]
+
+
+def _check_chunk(pairs: List[Tuple[bytes, str]]) -> List[bool]:
+    """Check a chunk of (hashed_password, password) pairs in a worker."""
+    return [bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+            for hashed_password, password in pairs]
+
+
+def _map_chunks(func: Callable, items: Iterable, args: tuple,
+                workers: int, chunk_size: int) -> Iterator:
+    """
+    Apply func to chunks of items on a process pool, in input order.
+
+    At most two chunks per worker are in flight, so items are consumed
+    as a stream rather than read up front.
+    """
+    items = iter(items)
+    workers = workers or os.cpu_count() or 1
+    window = workers * 2
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if chunk:
+                pending.append(executor.submit(func, chunk, *args))
+            if pending and (len(pending) >= window or not chunk):
+                yield from pending.popleft().result()
+            if not chunk and not pending:
+                return
+
+
+def hash_passwords(passwords: Iterable[str], workers: int = None,
+                   chunk_size: int = 16) -> Iterator[bytes]:
+    """
+    Hash many passwords across all cores, e.g. for bulk user imports.
+
+    Args:
+        passwords (Iterable[str]): The passwords, read lazily.
+        workers (int): Number of processes, defaults to the CPU count.
+        chunk_size (int): Number of passwords sent to a worker at once.
+
+    Returns:
+        Iterator[bytes]: The hashed passwords, in input order.
+    """
+    return _map_chunks(_hash_chunk, passwords, (get_rounds(),), workers,
+                       chunk_size)
+
+
+def verify_many(pairs: Iterable[Tuple[bytes, str]], workers: int = None,
+                chunk_size: int = 16) -> Iterator[bool]:
+    """
+    Check many passwords against their hashes across all cores.
+
+    Args:
+        pairs (Iterable[Tuple[bytes, str]]): (hashed_password, password)
+            pairs, as taken by is_valid, read lazily.
+        workers (int): Number of processes, defaults to the CPU count.
+        chunk_size (int): Number of pairs sent to a worker at once.
+
+    Returns:
+        Iterator[bool]: Whether each password matches, in input order.
+    """
+    return _map_chunks(_check_chunk, pairs, (), workers, chunk_size)
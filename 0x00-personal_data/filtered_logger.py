@@ -5,8 +5,20 @@ Filtered Logger
 
 import os
 import re
+import sys
+import atexit
 import logging
-from typing import List
+import logging.handlers
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, TextIO, Tuple
 import mysql.connector
 from mysql.connector import connection
 
@@ -28,9 +40,60 @@ def filter_datum(fields: List[str], redaction: str, message: str,
     Returns:
         str: The obfuscated log message.
     """
-    pattern = '|'.join([f"{field}=[^{separator}]*" for field in fields])
-    return re.sub(pattern, lambda m: f"{m.group(0).split('=')[0]}={redaction}",
-                  message)
+    engine = get_redaction_engine(tuple(fields), redaction, separator)
+    return engine.redact(message)
+
+
+class RedactionEngine:
+    """ Compiled redaction pattern for a fixed set of fields """
+
+    def __init__(self, fields: Tuple[str, ...], redaction: str,
+                 separator: str):
+        self.fields = tuple(fields)
+        self.redaction = redaction
+        self.separator = separator
+        # Values never span lines, so a batch of log lines can be redacted
+        # in a single call
+        value = f"=[^{re.escape(separator)}\\n]*"
+        # One literal-replacement pass per field: re substitutes literal
+        # templates in C, without calling back into Python per match
+        self._passes = [
+            (re.compile(re.escape(field) + value),
+             f"{field}={redaction}".replace('\\', r'\\'))
+            for field in self.fields
+        ]
+
+    def redact(self, message: str) -> str:
+        """
+        Obfuscates the configured fields in a log message.
+
+        Args:
+            message (str): The log line.
+
+        Returns:
+            str: The obfuscated log message.
+        """
+        for pattern, replacement in self._passes:
+            message = pattern.sub(replacement, message)
+        return message
+
+
+@lru_cache(maxsize=128)
+def get_redaction_engine(fields: Tuple[str, ...], redaction: str,
+                         separator: str) -> RedactionEngine:
+    """
+    Returns the shared RedactionEngine for the given parameters,
+    compiling it on first use.
+
+    Args:
+        fields (Tuple[str, ...]): Fields to obfuscate.
+        redaction (str): String to replace the field values.
+        separator (str): Character separating fields in the log line.
+
+    Returns:
+        RedactionEngine: The cached engine.
+    """
+    return RedactionEngine(fields, redaction, separator)
 
 
 class RedactingFormatter(logging.Formatter):
@@ -42,56 +105,434 @@ class RedactingFormatter(logging.Formatter):
     def __init__(self, fields: List[str]):
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
+        self._engine = get_redaction_engine(tuple(fields), self.REDACTION,
+                                            self.SEPARATOR)
+        self._field_set = frozenset(fields)
+
+    def redact_mapping(self, data: Mapping) -> dict:
+        """
+        Replaces the values of PII keys in a mapping.
+        Args:
+            data (Mapping): Structured log data, e.g. a users row.
+        Returns:
+            dict: A redacted copy of data.
+        """
+        return {key: self.REDACTION if key in self._field_set else value
+                for key, value in data.items()}
+
+    def serialize(self, data: Mapping) -> str:
+        """
+        Serializes structured log data to a redacted key=value message.
+        Args:
+            data (Mapping): Structured log data, e.g. a users row.
+        Returns:
+            str: The redacted message.
+        """
+        return f"{self.SEPARATOR} ".join(
+            [f"{key}={self.REDACTION if key in self._field_set else value}"
+             for key, value in data.items()])
 
     def format(self, record: logging.LogRecord) -> str:
         """
-        Filters values in incoming log records using filter_datum.
+        Filters values in incoming log records.
+
+        A mapping passed as the message (logger.info(row)) or as the
+        %-style arguments (logger.info("email=%(email)s", row)) is redacted
+        by key; plain string messages go through filter_datum's engine.
         Args:
             record (logging.LogRecord): Log record.
         Returns:
             str: The formatted and obfuscated log message.
         """
-        record.msg = filter_datum(self.fields, self.REDACTION, record.msg,
-                                  self.SEPARATOR)
+        if isinstance(record.msg, Mapping):
+            record.msg = self.serialize(record.msg)
+        elif isinstance(record.args, Mapping):
+            record.args = self.redact_mapping(record.args)
+        else:
+            record.msg = self._engine.redact(record.msg)
         return super(RedactingFormatter, self).format(record)
 
 
-def get_logger() -> logging.Logger:
-    """Creates a logger with specified parameters."""
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """ QueueHandler over a bounded queue with an overflow policy """
+    OVERFLOW_POLICIES = ("block", "drop", "count")
+
+    def __init__(self, record_queue: queue.Queue, overflow: str = "block"):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        super(BoundedQueueHandler, self).__init__(record_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Leaves formatting, and so redaction, to the listener thread.
+        Args:
+            record (logging.LogRecord): Log record.
+        Returns:
+            logging.LogRecord: The record, unchanged.
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Queues a record, applying the overflow policy when the queue is full.
+        Args:
+            record (logging.LogRecord): Log record.
+        """
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow == "count":
+                # Under the handler lock, as enqueue may run outside handle
+                with self.lock:
+                    self.dropped += 1
+
+
+def get_logger(asynchronous: bool = False, queue_size: int = 10000,
+               overflow: str = "block") -> logging.Logger:
+    """
+    Creates a logger with specified parameters.
+
+    Later calls with the same options return the logger unchanged instead
+    of stacking extra handlers; calls with other options replace its
+    handler, after writing the records queued so far.
+
+    Args:
+        asynchronous (bool): Format and write records on a QueueListener
+            thread instead of the calling thread.
+        queue_size (int): Maximum number of queued records.
+        overflow (str): What to do when the queue is full: "block" the
+            caller, "drop" the record, or drop it and "count" it.
+
+    Returns:
+        logging.Logger: The user_data logger.
+    """
+    options = (True, queue_size, overflow) if asynchronous else (False,)
     logger = logging.getLogger("user_data")
+    for old in list(logger.handlers):
+        if getattr(old, "options", None) == options:
+            return logger
+        listener = getattr(old, "listener", None)
+        if listener is not None:
+            listener.stop()
+            atexit.unregister(listener.stop)
+        logger.removeHandler(old)
     logger.setLevel(logging.INFO)
     logger.propagate = False
     handler = logging.StreamHandler()
     formatter = RedactingFormatter(fields=PII_FIELDS)
     handler.setFormatter(formatter)
+    if asynchronous:
+        queue_handler = BoundedQueueHandler(queue.Queue(queue_size), overflow)
+        listener = logging.handlers.QueueListener(queue_handler.queue, handler)
+        listener.start()
+        atexit.register(listener.stop)
+        queue_handler.listener = listener
+        handler = queue_handler
+    handler.options = options
     logger.addHandler(handler)
 
     return logger
 
 
+def _db_config() -> dict:
+    """Reads the connection parameters from the environment."""
+    return {
+        "user": os.getenv('PERSONAL_DATA_DB_USERNAME', 'root'),
+        "password": os.getenv('PERSONAL_DATA_DB_PASSWORD', ''),
+        "host": os.getenv('PERSONAL_DATA_DB_HOST', 'localhost'),
+        "database": os.getenv('PERSONAL_DATA_DB_NAME'),
+    }
+
+
 def get_db() -> connection.MySQLConnection:
     """Connects to the database and returns the connection object."""
-    username = os.getenv('PERSONAL_DATA_DB_USERNAME', 'root')
-    password = os.getenv('PERSONAL_DATA_DB_PASSWORD', '')
-    host = os.getenv('PERSONAL_DATA_DB_HOST', 'localhost')
-    database = os.getenv('PERSONAL_DATA_DB_NAME')
-    return mysql.connector.connect(
-        user=username,
-        password=password,
-        host=host,
-        database=database
-    )
+    return mysql.connector.connect(**_db_config())
+
+
+class ConnectionPool:
+    """ Fixed-size pool of reusable database connections """
+
+    def __init__(self, size: int = 5, connect: Callable = get_db,
+                 timeout: float = None):
+        self.size = size
+        self.timeout = timeout
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._acquired = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    @contextmanager
+    def connection(self):
+        """
+        Lends a connection for the duration of a with block.
+        Yields:
+            A healthy connection, returned to the pool on exit.
+        Raises:
+            TimeoutError: If none frees up within the pool timeout.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _acquire(self):
+        """Takes an idle connection, opens a new one or waits for one."""
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                self._record_wait(0.0, False)
+                return self._open()
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._timeouts += 1
+                raise TimeoutError("No database connection available")
+            self._record_wait(time.perf_counter() - start, True)
+        else:
+            self._record_wait(0.0, False)
+        if self._is_healthy(conn):
+            return conn
+        try:
+            conn.close()
+        except Exception:
+            pass
+        return self._open()
+
+    def _open(self):
+        """Opens a connection, releasing its slot if that fails."""
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        """Pings the connection when the driver supports it."""
+        is_connected = getattr(conn, "is_connected", None)
+        if is_connected is None:
+            return True
+        try:
+            return bool(is_connected())
+        except Exception:
+            return False
+
+    def _record_wait(self, wait: float, waited: bool) -> None:
+        """Accounts one acquisition in the wait-time statistics."""
+        with self._lock:
+            self._acquired += 1
+            if waited:
+                self._waits += 1
+                self._wait_time += wait
+                self._max_wait = max(self._max_wait, wait)
+
+    def stats(self) -> dict:
+        """
+        Reports pool usage.
+        Returns:
+            dict: Pool size, open and idle connections, acquisitions, how
+            many of them had to wait, for how long in total, on average
+            per wait and at most (in seconds), and how many waits timed
+            out.
+        """
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": self._idle.qsize(),
+                "acquired": self._acquired,
+                "waits": self._waits,
+                "total_wait": self._wait_time,
+                "avg_wait": self._wait_time / self._waits
+                if self._waits else 0.0,
+                "max_wait": self._max_wait,
+                "timeouts": self._timeouts,
+            }
+
+    def close(self) -> None:
+        """Closes the idle connections."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self._created -= 1
+            conn.close()
+
+
+def get_db_pool(size: int = None) -> ConnectionPool:
+    """
+    Creates a connection pool over the PERSONAL_DATA_DB_* settings.
+    Args:
+        size (int): Maximum number of connections, defaults to
+            PERSONAL_DATA_DB_POOL_SIZE or 5.
+    Returns:
+        ConnectionPool: The pool.
+    """
+    if size is None:
+        size = int(os.getenv('PERSONAL_DATA_DB_POOL_SIZE', 5))
+    return ConnectionPool(size)
+
+
+def _redact_block(key: Tuple[Tuple[str, ...], str, str], block: str) -> str:
+    """Redacts a block of log lines in a pool worker."""
+    return get_redaction_engine(*key).redact(block)
+
+
+def redact_blocks(blocks: Iterable[str], fields: List[str] = PII_FIELDS,
+                  workers: int = 1) -> Iterator[str]:
+    """
+    Redacts blocks of log lines, optionally across a process pool.
+
+    Blocks are yielded in their original order. At most two blocks per
+    worker are in flight, so the input is consumed as a stream.
+
+    Args:
+        blocks (Iterable[str]): Newline separated log lines.
+        fields (List[str]): Fields to obfuscate.
+        workers (int): Number of worker processes, 1 redacts inline.
+
+    Returns:
+        Iterator[str]: The redacted blocks.
+    """
+    key = (tuple(fields), RedactingFormatter.REDACTION,
+           RedactingFormatter.SEPARATOR)
+    if workers <= 1:
+        engine = get_redaction_engine(*key)
+        for block in blocks:
+            yield engine.redact(block)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for block in blocks:
+            pending.append(pool.apply_async(_redact_block, (key, block)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def redact_lines(lines: Iterable[str], sink: TextIO,
+                 fields: List[str] = PII_FIELDS, workers: int = 1,
+                 chunk_size: int = 10000) -> int:
+    """
+    Redacts log lines (e.g. an open log file) into a sink.
+
+    Args:
+        lines (Iterable[str]): Log lines, each ending with a newline.
+        sink (TextIO): Where the redacted lines are written.
+        fields (List[str]): Fields to obfuscate.
+        workers (int): Number of worker processes.
+        chunk_size (int): Number of lines sent to a worker at once.
+
+    Returns:
+        int: The number of redacted lines.
+    """
+    count = 0
+    lines = iter(lines)
+
+    def chunks() -> Iterator[str]:
+        nonlocal count
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                return
+            count += len(chunk)
+            yield "".join(chunk)
+
+    for block in redact_blocks(chunks(), fields, workers):
+        sink.write(block)
+    return count
+
+
+def export_users(db, sink: TextIO = None, batch_size: int = 1000,
+                 workers: int = 1) -> int:
+    """
+    Streams the users table to a sink in redacted batches.
+
+    Rows are pulled with fetchmany so the result set is never held in
+    memory (mysql.connector cursors are unbuffered by default); each batch
+    is formatted, redacted in one pass and written with a single call.
+    The rows of a batch share one log timestamp: the time it was fetched.
+    The cursor is closed even if the export fails; the connection is left
+    to the caller.
+
+    Args:
+        db: A DB-API connection.
+        sink (TextIO): Where the log lines go, defaults to sys.stderr.
+        batch_size (int): Number of rows fetched and written per batch.
+        workers (int): Number of redaction processes.
+
+    Returns:
+        int: The number of exported rows.
+    """
+    if sink is None:
+        sink = sys.stderr
+    formatter = logging.Formatter(RedactingFormatter.FORMAT)
+    cursor = db.cursor()
+    exported = 0
+
+    def batches() -> Iterator[str]:
+        nonlocal exported
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            record = logging.LogRecord("user_data", logging.INFO, None, None,
+                                       "", None, None)
+            prefix = formatter.format(record)
+            exported += len(rows)
+            yield "".join(
+                prefix + "; ".join([f"{key}={value}"
+                                    for key, value in zip(columns, row)])
+                + "\n" for row in rows)
+
+    try:
+        cursor.execute("SELECT * FROM users;")
+        columns = [column[0] for column in cursor.description]
+        for block in redact_blocks(batches(), PII_FIELDS, workers):
+            sink.write(block)
+    finally:
+        cursor.close()
+    return exported
 
 
 def main():
     """Main function to retrieve and log user data."""
     db = get_db()
+    batch_size = os.getenv('PERSONAL_DATA_EXPORT_BATCH_SIZE')
+    if batch_size:
+        workers = int(os.getenv('PERSONAL_DATA_EXPORT_WORKERS', 1))
+        try:
+            export_users(db, batch_size=int(batch_size), workers=workers)
+        finally:
+            db.close()
+        return
     cursor = db.cursor(dictionary=True)
     cursor.execute("SELECT * FROM users;")
     logger = get_logger()
     for row in cursor:
-        message = "; ".join([f"{key}={value}" for key, value in row.items()])
-        logger.info(message)
+        logger.info(row)
     cursor.close()
     db.close()
 
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Bulk CSV redaction
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+import sys
+from collections import deque
+from itertools import islice
+from typing import BinaryIO, Iterator, List, TextIO, Tuple
+
+from filtered_logger import PII_FIELDS, RedactingFormatter
+
+BUFFER_SIZE = 1 << 20
+SHARD_SIZE = 32 << 20
+
+
+def redact_csv(src: TextIO, dst: TextIO, fields: List[str] = PII_FIELDS,
+               redaction: str = RedactingFormatter.REDACTION,
+               chunk_size: int = 10000) -> int:
+    """
+    Streams a CSV file with a header row, replacing whole PII columns.
+
+    Columns are resolved to indexes from the header once, so no regex runs
+    on the data; rows are read and written chunk_size at a time, keeping
+    memory flat whatever the file size.
+
+    Args:
+        src (TextIO): The CSV to redact, opened with newline=''.
+        dst (TextIO): Where the redacted CSV is written.
+        fields (List[str]): Names of the columns to redact.
+        redaction (str): String to replace the column values.
+        chunk_size (int): Number of rows per read/write.
+
+    Returns:
+        int: The number of redacted rows.
+    """
+    reader = csv.reader(src)
+    writer = csv.writer(dst)
+    header = next(reader, None)
+    if header is None:
+        return 0
+    writer.writerow(header)
+    indexes = [index for index, name in enumerate(header) if name in fields]
+    count = 0
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            break
+        _redact_rows(rows, indexes, redaction)
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+def _redact_rows(rows: List[List[str]], indexes: List[int],
+                 redaction: str) -> None:
+    """Redacts columns of rows in place, skipping blank or short rows."""
+    for row in rows:
+        for index in indexes:
+            if index < len(row):
+                row[index] = redaction
+
+
+def _boundary(src: BinaryIO, offset: int, quotes: int) -> Tuple[int, int]:
+    """
+    Finds the first record boundary at or after offset.
+
+    A newline ends a record unless it sits inside a quoted field, which is
+    the case when an odd number of quote characters precede it (escaped
+    quotes come in pairs).
+
+    Args:
+        src (BinaryIO): The CSV file.
+        offset (int): Where to start looking.
+        quotes (int): Number of quote characters before offset.
+
+    Returns:
+        Tuple[int, int]: The boundary, or the file size if none is left,
+        and the number of quote characters before it.
+    """
+    src.seek(offset)
+    while True:
+        block = src.read(BUFFER_SIZE)
+        if not block:
+            return offset, quotes
+        start = 0
+        while True:
+            newline = block.find(b'\n', start)
+            if newline < 0:
+                quotes += block.count(b'"', start)
+                offset += len(block)
+                break
+            quotes += block.count(b'"', start, newline)
+            start = newline + 1
+            if quotes % 2 == 0:
+                return offset + start, quotes
+
+
+def _shards(src: BinaryIO, start: int,
+            shard_size: int) -> Iterator[Tuple[int, int]]:
+    """
+    Splits a CSV file from start into byte ranges of about shard_size
+    bytes, each ending on a record boundary.
+    """
+    size = src.seek(0, os.SEEK_END)
+    quotes = 0
+    while start < size:
+        src.seek(start)
+        quotes += src.read(shard_size).count(b'"')
+        end, quotes = _boundary(src, min(start + shard_size, size), quotes)
+        yield start, end
+        start = end
+
+
+def _redact_shard(src_path: str, start: int, end: int, indexes: List[int],
+                  redaction: str, encoding: str) -> Tuple[bytes, int]:
+    """
+    Redacts the records of a byte range of a CSV file in a worker.
+
+    Ranges without quotes or carriage returns hold one record per line and
+    no field needs quoting, so they are split and joined as bytes, about
+    three times faster than a round trip through the csv module.
+    """
+    with open(src_path, 'rb') as src:
+        src.seek(start)
+        data = src.read(end - start)
+    if b'"' not in data and b'\r' not in data:
+        lines = data.split(b'\n')
+        if not lines[-1]:
+            lines.pop()
+        redacted = redaction.encode(encoding)
+        for number, line in enumerate(lines):
+            if line:
+                row = line.split(b',')
+                for index in indexes:
+                    if index < len(row):
+                        row[index] = redacted
+                lines[number] = b','.join(row)
+        lines.append(b'')
+        return b'\r\n'.join(lines), len(lines) - 1
+    rows = list(csv.reader(io.StringIO(data.decode(encoding), newline='')))
+    _redact_rows(rows, indexes, redaction)
+    dst = io.StringIO(newline='')
+    csv.writer(dst).writerows(rows)
+    return dst.getvalue().encode(encoding), len(rows)
+
+
+def redact_csv_file(src_path: str, dst: BinaryIO,
+                    fields: List[str] = PII_FIELDS,
+                    redaction: str = RedactingFormatter.REDACTION,
+                    workers: int = None, shard_size: int = SHARD_SIZE,
+                    encoding: str = 'utf-8') -> int:
+    """
+    Redacts a CSV file with a header row across a process pool.
+
+    The file is split into byte ranges ending on record boundaries, which
+    workers read, redact and serialize on their own; the parent only finds
+    the boundaries (a scan for newlines and quotes) and writes the results
+    back in order. At most two ranges per worker are in flight.
+
+    Args:
+        src_path (str): Path of the CSV to redact.
+        dst (BinaryIO): Where the redacted CSV is written.
+        fields (List[str]): Names of the columns to redact.
+        redaction (str): String to replace the column values.
+        workers (int): Number of worker processes, defaults to
+            REDACT_CSV_WORKERS or the CPU count; 1 redacts inline.
+        shard_size (int): Approximate size in bytes of a range.
+        encoding (str): Encoding of the file, ASCII compatible.
+
+    Returns:
+        int: The number of redacted rows.
+    """
+    if workers is None:
+        workers = int(os.getenv('REDACT_CSV_WORKERS', os.cpu_count() or 1))
+    with open(src_path, 'rb') as src:
+        header_end, _ = _boundary(src, 0, 0)
+        src.seek(0)
+        header = next(csv.reader(io.StringIO(
+            src.read(header_end).decode(encoding), newline='')), None)
+        if header is None:
+            return 0
+        line = io.StringIO(newline='')
+        csv.writer(line).writerow(header)
+        dst.write(line.getvalue().encode(encoding))
+        indexes = [index for index, name in enumerate(header)
+                   if name in fields]
+        shards = _shards(src, header_end, shard_size)
+        count = 0
+        if workers <= 1:
+            for start, end in shards:
+                data, rows = _redact_shard(src_path, start, end, indexes,
+                                           redaction, encoding)
+                dst.write(data)
+                count += rows
+            return count
+        with multiprocessing.Pool(workers) as pool:
+            pending = deque()
+            for start, end in shards:
+                pending.append(pool.apply_async(
+                    _redact_shard, (src_path, start, end, indexes,
+                                    redaction, encoding)))
+                if len(pending) >= workers * 2:
+                    data, rows = pending.popleft().get()
+                    dst.write(data)
+                    count += rows
+            while pending:
+                data, rows = pending.popleft().get()
+                dst.write(data)
+                count += rows
+        return count
+
+
+def main():
+    """Redacts argv[1] into argv[2] (- for stdout), optional fields after"""
+    if len(sys.argv) < 3:
+        print("Usage: {} <src.csv> <dst.csv|-> [field ...]".format(
+            sys.argv[0]), file=sys.stderr)
+        sys.exit(1)
+    fields = sys.argv[3:] or PII_FIELDS
+    if sys.argv[2] == '-':
+        redact_csv_file(sys.argv[1], sys.stdout.buffer, fields)
+        return
+    with open(sys.argv[2], 'wb', buffering=BUFFER_SIZE) as dst:
+        redact_csv_file(sys.argv[1], dst, fields)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,9 @@ app.register_blueprint(app_views, url_prefix='/api/v1')
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
 auth = None
 auth_type = getenv('AUTH_TYPE')
+# Paths served without authentication
+EXCLUDED_PATHS = ('/api/v1/status/', '/api/v1/unauthorized/',
+                  '/api/v1/forbidden/')
 
 
 if auth_type == 'basic_auth':
@@ -66,9 +69,7 @@ def before_request():
     """
     if auth is None:
         return
-    excluded_paths = ['/api/v1/status/', '/api/v1/unauthorized/',
-                      '/api/v1/forbidden/']
-    if not auth.require_auth(request.path, excluded_paths):
+    if not auth.require_auth(request.path, EXCLUDED_PATHS):
         return
     if auth.authorization_header(request) is None:
         abort(401)
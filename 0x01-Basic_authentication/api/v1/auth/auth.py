@@ -3,19 +3,81 @@
 Auth module
 """
 
-from typing import List, TypeVar
+from functools import lru_cache
+from typing import List, Tuple, TypeVar
 from flask import request
 from os import getenv
 import fnmatch
+import re
+
+
+class PathMatcher:
+    """
+    Excluded paths compiled once: exact paths in a set, wildcard patterns
+    (fnmatch syntax) in one combined regex, and results memoized per
+    path in a bounded LRU cache.
+    """
+    def __init__(self, excluded_paths: Tuple[str, ...],
+                 cache_size: int = 1024):
+        """
+        Compile the excluded paths.
+        Args:
+            excluded_paths (Tuple[str, ...]): The paths that do not require
+            authentication, with optional trailing slashes and wildcards.
+            cache_size (int): The number of paths to memoize.
+        """
+        self.exact = set()
+        patterns = []
+        for ex_path in excluded_paths:
+            ex_path = ex_path.rstrip('/')
+            if any(c in ex_path for c in '*?['):
+                patterns.append(fnmatch.translate(ex_path))
+            else:
+                self.exact.add(ex_path)
+        self.pattern = None
+        if patterns:
+            self.pattern = re.compile('|'.join(patterns))
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, path: str) -> bool:
+        """
+        Checks if a path is excluded.
+        Args:
+            path (str): The path to check.
+        Returns:
+            bool: True if the path matches an excluded path.
+        """
+        path = path.rstrip('/')
+        if path in self.exact:
+            return True
+        return self.pattern is not None and \
+            self.pattern.match(path) is not None
+
+
+@lru_cache(maxsize=32)
+def compile_excluded_paths(excluded_paths: Tuple[str, ...]) -> PathMatcher:
+    """
+    Compile excluded paths, once per distinct tuple of paths.
+    Args:
+        excluded_paths (Tuple[str, ...]): The excluded paths.
+    Returns:
+        PathMatcher: The compiled matcher.
+    """
+    return PathMatcher(excluded_paths)
 
 
 class Auth:
     """
     Auth class that manages the API authentication.
     """
+    # (excluded paths tuple, PathMatcher) of the last require_auth call
+    _compiled = (None, None)
+
     def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
         """
         Checks if a given path requires authentication.
+        The excluded paths are compiled once; passing the same tuple on
+        every request skips even the lookup of the compiled matcher.
         Args:
             path (str): The path to check.
             excluded_paths (List[str]): A list of paths that do not require
@@ -25,12 +87,12 @@ class Auth:
         """
         if path is None or excluded_paths is None or excluded_paths == []:
             return True
-        path = path.rstrip('/')
-        for ex_path in excluded_paths:
-            ex_path = ex_path.rstrip('/')
-            if fnmatch.fnmatch(path, ex_path):
-                return False
-        return True
+        compiled_paths, matcher = self._compiled
+        if excluded_paths is not compiled_paths:
+            compiled_paths = tuple(excluded_paths)
+            matcher = compile_excluded_paths(compiled_paths)
+            self._compiled = (compiled_paths, matcher)
+        return not matcher.match(path)
 
     def authorization_header(self, request=None) -> str:
         """
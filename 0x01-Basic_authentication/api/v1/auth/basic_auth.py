@@ -4,7 +4,13 @@ Basic authentication module
 """
 
 import base64
+import os
+import threading
+import time
 from api.v1.auth.auth import Auth
+from collections import OrderedDict
+from hashlib import blake2b
+from os import getenv
 from typing import Optional, Tuple, TypeVar
 from models.user import User
 
@@ -12,10 +18,139 @@ from models.user import User
 UserType = TypeVar('UserType', bound=User)
 
 
+class CredentialCache:
+    """
+    Bounded LRU cache, with a TTL, of verified Authorization headers.
+
+    Keys are a keyed BLAKE2b hash (a MAC, cheaper than HMAC-SHA256) of the
+    raw header under a random per-process key, so the cache never holds
+    credentials. Each entry maps to the user ID with
+    the email and password hash it was verified against: a hit is only
+    served while the stored user still has both, so a deleted user or a
+    changed password or email invalidates it.
+    """
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        """
+        Initialize the cache.
+        Args:
+            max_size (int): The maximum number of entries.
+            ttl (float): The lifetime of an entry, in seconds.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._secret = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+
+    def key(self, authorization_header: str) -> bytes:
+        """
+        Compute the cache key of an Authorization header.
+        Args:
+            authorization_header (str): The raw header value.
+        Returns:
+            bytes: The keyed BLAKE2b hash of the header.
+        """
+        return blake2b(authorization_header.encode(), key=self._secret,
+                       digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[UserType]:
+        """
+        Retrieve the user verified for a key.
+        Args:
+            key (bytes): The cache key of the header.
+        Returns:
+            Optional[UserType]: The User instance if the entry is live and
+            still matches the stored user, otherwise None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[3] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        user_id, email, password, _ = entry
+        user = User.get(user_id)
+        if user is None or user.email != email or \
+                user.password != password:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        return user
+
+    def put(self, key: bytes, user: UserType):
+        """
+        Store the user verified for a key, evicting the least recently
+        used entry when full.
+        Args:
+            key (bytes): The cache key of the header.
+            user (UserType): The verified User instance.
+        """
+        if self.max_size <= 0:
+            return
+        entry = (user.id, user.email, user.password,
+                 time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def record(self, hit: bool, seconds: float):
+        """
+        Count a lookup and its latency.
+        Args:
+            hit (bool): Whether the cache answered the lookup.
+            seconds (float): The time taken to resolve the user.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.hit_seconds += seconds
+            else:
+                self.misses += 1
+                self.miss_seconds += seconds
+
+    def stats(self) -> dict:
+        """
+        Report the size, hit rate and average latencies of the cache.
+        Returns:
+            dict: The counters, latencies in milliseconds.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'hit_ms': 1000 * self.hit_seconds / self.hits
+                if self.hits else 0.0,
+                'miss_ms': 1000 * self.miss_seconds / self.misses
+                if self.misses else 0.0,
+            }
+
+
 class BasicAuth(Auth):
     """
     Basic authentication class that inherits from Auth.
     """
+    def __init__(self):
+        """
+        Initialize the verified credentials cache, sized by
+        BASIC_AUTH_CACHE_SIZE and expiring after BASIC_AUTH_CACHE_TTL
+        seconds.
+        """
+        self.credential_cache = CredentialCache(
+            int(getenv('BASIC_AUTH_CACHE_SIZE', 1024)),
+            float(getenv('BASIC_AUTH_CACHE_TTL', 300)))
+
     def extract_base64_authorization_header(
         self, authorization_header: Optional[str]
     ) -> Optional[str]:
@@ -98,6 +233,8 @@ class BasicAuth(Auth):
     def current_user(self, request=None) -> TypeVar('User'):
         """
         Retrieve the User instance for a request.
+        Repeated headers are answered from the verified credentials cache,
+        without decoding, searching or hashing.
         Args:
             request: The Flask request object.
         Returns:
@@ -106,8 +243,31 @@ class BasicAuth(Auth):
         if request is None:
             return None
         auth_header = self.authorization_header(request)
-        if auth_header is None:
+        if not isinstance(auth_header, str):
             return None
+        start = time.perf_counter()
+        cache = self.credential_cache
+        key = cache.key(auth_header)
+        user = cache.get(key)
+        if user is not None:
+            cache.record(True, time.perf_counter() - start)
+            return user
+        user = self.user_object_from_header(auth_header)
+        if user is not None:
+            cache.put(key, user)
+        cache.record(False, time.perf_counter() - start)
+        return user
+
+    def user_object_from_header(
+        self, auth_header: str
+    ) -> Optional[UserType]:
+        """
+        Retrieve a User instance from an Authorization header.
+        Args:
+            auth_header (str): The Authorization header as a string.
+        Returns:
+            Optional[UserType]: The User instance if valid, otherwise None.
+        """
         base64_header = self.extract_base64_authorization_header(auth_header)
         if base64_header is None:
             return None
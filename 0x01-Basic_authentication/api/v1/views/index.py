@@ -19,10 +19,15 @@ def stats() -> str:
     """ GET /api/v1/stats
     Return:
       - the number of each objects
+      - the verified credentials cache counters, with Basic auth
     """
     from models.user import User
+    from api.v1.app import auth
     stats = {}
     stats['users'] = User.count()
+    cache = getattr(auth, 'credential_cache', None)
+    if cache is not None:
+        stats['basic_auth_cache'] = cache.stats()
     return jsonify(stats)
 
 
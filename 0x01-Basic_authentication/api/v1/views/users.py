@@ -2,18 +2,109 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import abort, current_app, jsonify, request, stream_with_context
 from models.user import User
+import base64
+import json
+
+
+# Serialized GET /users body, keyed by the User store version tag
+all_users_cache = {}
+MAX_PAGE_SIZE = 1000
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters (all optional):
+      - limit: page size, pages are ordered by ID
+      - cursor: next_cursor of the previous page
+      - fields: comma separated attributes to return, e.g. email,id
+      - stream: 1 to stream the full list as chunked JSON
     Return:
       - list of all User objects JSON represented
+      - with limit: {"users": [...], "next_cursor": cursor or null}
+      - 304 if If-None-Match has the ETag of the current list
+      - 400 if limit or cursor is invalid
+    """
+    if request.args.get('stream') == '1':
+        return stream_users(request.args.get('fields'))
+    if 'limit' in request.args or 'cursor' in request.args:
+        return page_users(request.args.get('limit'),
+                          request.args.get('cursor'),
+                          request.args.get('fields'))
+    if request.args.get('fields'):
+        fields = request.args.get('fields').split(',')
+        return jsonify([project(user, fields) for user in User.all()])
+    version = User.version_tag()
+    body = all_users_cache.get(version)
+    if body is None:
+        all_users = [user.to_json() for user in User.all()]
+        body = jsonify(all_users).get_data()
+        all_users_cache.clear()
+        all_users_cache[version] = body
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(version)
+    return response.make_conditional(request)
+
+
+def project(user: User, fields: list = None) -> dict:
+    """ Public JSON of a user, restricted to fields if given
+    """
+    user_json = user.to_json()
+    if not fields:
+        return user_json
+    return {key: user_json[key] for key in fields if key in user_json}
+
+
+def page_users(limit: str, cursor: str, fields: str) -> str:
+    """ One page of users after an opaque cursor
+    """
+    try:
+        limit = min(int(limit or MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+    except ValueError:
+        limit = 0
+    if limit <= 0:
+        return jsonify({'error': "Invalid limit"}), 400
+    last_id = None
+    if cursor:
+        try:
+            last_id = base64.b64decode(cursor, altchars=b'-_',
+                                       validate=True).decode()
+        except ValueError:
+            return jsonify({'error': "Invalid cursor"}), 400
+    page = User.page(last_id, limit + 1)
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = base64.urlsafe_b64encode(
+            page[-1].id.encode()).decode()
+    fields = fields.split(',') if fields else None
+    return jsonify({'users': [project(user, fields) for user in page],
+                    'next_cursor': next_cursor})
+
+
+def stream_users(fields: str) -> str:
+    """ All users as a chunked JSON array, one user serialized at a time
+    and MAX_PAGE_SIZE users loaded at a time
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    fields = fields.split(',') if fields else None
+
+    def generate():
+        yield "["
+        last_id = None
+        while True:
+            users = User.page(last_id, MAX_PAGE_SIZE)
+            if not users:
+                break
+            for user in users:
+                if last_id is not None:
+                    yield ","
+                yield json.dumps(project(user, fields))
+                last_id = user.id
+        yield "]"
+    return current_app.response_class(stream_with_context(generate()),
+                                      mimetype='application/json')
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -64,12 +155,22 @@ def create_user() -> str:
       - 400 if can't create the new User
     """
     rj = None
-    error_msg = None
     try:
         rj = request.get_json()
     except Exception as e:
         rj = None
-    if rj is None:
+    body, status = create_one(rj)
+    return jsonify(body), status
+
+
+def create_one(rj: dict) -> tuple:
+    """ Create a User from a POST /users JSON body
+    Return:
+      - (User object JSON represented, 201)
+      - ({"error": message}, 400) if can't create the new User
+    """
+    error_msg = None
+    if not isinstance(rj, dict):
         error_msg = "Wrong format"
     if error_msg is None and rj.get("email", "") == "":
         error_msg = "email missing"
@@ -83,10 +184,10 @@ def create_user() -> str:
             user.first_name = rj.get("first_name")
             user.last_name = rj.get("last_name")
             user.save()
-            return jsonify(user.to_json()), 201
+            return user.to_json(), 201
         except Exception as e:
             error_msg = "Can't create User: {}".format(e)
-    return jsonify({'error': error_msg}), 400
+    return {'error': error_msg}, 400
 
 
 @app_views.route('/users/<user_id>', methods=['PUT'], strict_slashes=False)
@@ -114,9 +215,104 @@ def update_user(user_id: str = None) -> str:
         rj = None
     if rj is None:
         return jsonify({'error': "Wrong format"}), 400
+    apply_update(user, rj)
+    return jsonify(user.to_json()), 200
+
+
+def apply_update(user: User, rj: dict):
+    """ Update and save a User from a PUT /users/:id JSON body
+    """
     if rj.get('first_name') is not None:
         user.first_name = rj.get('first_name')
     if rj.get('last_name') is not None:
         user.last_name = rj.get('last_name')
     user.save()
-    return jsonify(user.to_json()), 200
+
+
+def bulk_items() -> list:
+    """ Items of a bulk request body: a JSON array, or one JSON value per
+    line with the application/x-ndjson content type
+    Return:
+      - the list of items, None if the body can't be parsed
+    """
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            lines = request.get_data(as_text=True).splitlines()
+            return [json.loads(line) for line in lines if line.strip()]
+        items = request.get_json()
+    except Exception:
+        return None
+    return items if isinstance(items, list) else None
+
+
+def bulk_response(results: list) -> str:
+    """ JSON list of {"status": code, "body": JSON} per item
+    """
+    return jsonify([{'status': status, 'body': body}
+                    for body, status in results]), 200
+
+
+@app_views.route('/users/bulk', methods=['POST'], strict_slashes=False)
+def create_users() -> str:
+    """ POST /api/v1/users/bulk
+    Body: list of POST /api/v1/users JSON bodies
+    Return:
+      - per item result, all users saved with a single store write
+      - 400 if the body isn't a list
+    """
+    items = bulk_items()
+    if items is None:
+        return jsonify({'error': "Wrong format"}), 400
+    with User.transaction():
+        results = [create_one(rj) for rj in items]
+    return bulk_response(results)
+
+
+@app_views.route('/users/bulk', methods=['PUT'], strict_slashes=False)
+def update_users() -> str:
+    """ PUT /api/v1/users/bulk
+    Body: list of PUT /api/v1/users/:id JSON bodies, each with an "id"
+    Return:
+      - per item result, all users saved with a single store write
+      - 400 if the body isn't a list
+    """
+    items = bulk_items()
+    if items is None:
+        return jsonify({'error': "Wrong format"}), 400
+    results = []
+    with User.transaction():
+        for rj in items:
+            if not isinstance(rj, dict):
+                results.append(({'error': "Wrong format"}, 400))
+                continue
+            user = User.get(rj.get('id'))
+            if user is None:
+                results.append(({'error': "Not found"}, 404))
+                continue
+            apply_update(user, rj)
+            results.append((user.to_json(), 200))
+    return bulk_response(results)
+
+
+@app_views.route('/users/bulk', methods=['DELETE'], strict_slashes=False)
+def delete_users() -> str:
+    """ DELETE /api/v1/users/bulk
+    Body: list of User IDs (or of {"id": ...})
+    Return:
+      - per item result, all users removed with a single store write
+      - 400 if the body isn't a list
+    """
+    items = bulk_items()
+    if items is None:
+        return jsonify({'error': "Wrong format"}), 400
+    results = []
+    with User.transaction():
+        for item in items:
+            user_id = item.get('id') if isinstance(item, dict) else item
+            user = User.get(user_id) if isinstance(user_id, str) else None
+            if user is None:
+                results.append(({'error': "Not found"}, 404))
+                continue
+            user.remove()
+            results.append(({}, 200))
+    return bulk_response(results)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+""" Main 7
+"""
+import base64
+import os
+import sys
+import tempfile
+import time
+from api.v1.auth.basic_auth import BasicAuth, CredentialCache
+from models.user import User
+
+users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+
+
+class Request():
+    """ Request with only headers """
+    def __init__(self, email, pwd):
+        basic = "{}:{}".format(email, pwd).encode('utf-8')
+        self.headers = {'Authorization': "Basic {}".format(
+            base64.b64encode(basic).decode('utf-8'))}
+
+
+os.chdir(tempfile.mkdtemp())
+User.load_from_file()
+with User.transaction():
+    for i in range(users):
+        user = User()
+        user.email = "user{}@hbtn.io".format(i)
+        user.password = "pwd{}".format(i)
+        user.save()
+clients = [Request("user{}@hbtn.io".format(i), "pwd{}".format(i))
+           for i in range(0, users, users // 100)]
+
+for size in (0, 1024):
+    auth = BasicAuth()
+    auth.credential_cache = CredentialCache(size)
+    start = time.perf_counter()
+    for i in range(requests):
+        assert auth.current_user(clients[i % len(clients)]) is not None
+    elapsed = time.perf_counter() - start
+    print("cache size {}: {:.1f} us/request, {}".format(
+        size, 1e6 * elapsed / requests, auth.credential_cache.stats()))
+
+user = User.search({'email': "user0@hbtn.io"})[0]
+user.password = "changed"
+print("old password after change: {}".format(auth.current_user(clients[0])))
+user.password = "pwd0"
+print("restored password: {}".format(
+    auth.current_user(clients[0]).email))
+user.remove()
+print("after delete: {}".format(auth.current_user(clients[0])))
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+""" Main 8
+"""
+import fnmatch
+import sys
+import time
+from api.v1.auth.auth import Auth
+
+requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+
+def fnmatch_require_auth(path, excluded_paths):
+    """ require_auth matching every excluded path in turn """
+    path = path.rstrip('/')
+    for ex_path in excluded_paths:
+        if fnmatch.fnmatch(path, ex_path.rstrip('/')):
+            return False
+    return True
+
+
+paths = ["/api/v1/users", "/api/v1/users/42", "/api/v1/status",
+         "/api/v1/stats/", "/api/v1/forbidden"]
+for rules in (3, 300):
+    excluded_paths = ('/api/v1/status/', '/api/v1/unauthorized/',
+                      '/api/v1/forbidden/')
+    excluded_paths += tuple("/api/v1/public{}/*".format(i)
+                            for i in range(rules - 3))
+    for name, require_auth in (("fnmatch", fnmatch_require_auth),
+                               ("compiled", Auth().require_auth)):
+        start = time.perf_counter()
+        for i in range(requests):
+            require_auth(paths[i % len(paths)], excluded_paths)
+        print("{} rules, {}: {:.2f} us/request".format(
+            rules, name, 1e6 * (time.perf_counter() - start) / requests))
@@ -1,39 +1,236 @@
 #!/usr/bin/env python3
 """ Base module
 """
-from datetime import datetime
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from typing import TypeVar, List, Iterable
-from os import path
+from os import getenv, path
+from models.journal import Journal
+from models.store import STORES
+from models.writer import GroupWriter
+import atexit
+import itertools
 import json
+import threading
+import time
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+EPOCH = datetime(1970, 1, 1)
 DATA = {}
+INDEXES = {}
+# Per class version, taken from a shared counter on every change to its
+# stored objects
+VERSIONS = {}
+VERSION_COUNTER = itertools.count(1)
+# Versions of the objects kept in DATA restart with the process
+PROCESS_ID = uuid.uuid4().hex
+# Per class IDs of the stored objects in order, built by the first page()
+# call and kept in step by save() and remove()
+ORDERS = {}
+# Per class lock held by every change to its stored objects and indexes.
+# Readers take no lock: single lookups and the copies search() and
+# serialization iterate over are atomic under the GIL.
+LOCKS = {}
+# Keep loaded objects as their JSON until first accessed
+LAZY_LOAD = getenv('MODELS_LAZY_LOAD', '0') == '1'
+# "file" rewrites .db_<Class>.json on every write, "journal" appends to
+# .db_<Class>.journal and compacts it into the JSON file in the background,
+# any other value names a store of models.store.STORES that keeps the
+# objects instead of DATA: "sqlite" shares them between processes,
+# "columnar" packs them in arrays, several times smaller than objects
+STORAGE = getenv('MODELS_STORAGE', 'file')
+# "1" keeps the attributes of models in __slots__ instead of a __dict__
+# per instance, about 100 bytes less per object; attributes models don't
+# declare can't be set then
+SLOTS = getenv('MODELS_SLOTS', '0') == '1'
+JOURNAL_COMPACT_THRESHOLD = int(getenv('MODELS_JOURNAL_COMPACT', 10000))
+JOURNALS = {}
+# "sync" writes before save()/remove() return, "group" batches writes
+# and returns once the batch holding the change is written, "async"
+# batches writes and returns at once (changes since the last flush are
+# lost on a crash)
+DURABILITY = getenv('MODELS_DURABILITY', 'sync')
+FLUSH_INTERVAL = float(getenv('MODELS_FLUSH_INTERVAL', 0.1))
+FLUSH_THRESHOLD = int(getenv('MODELS_FLUSH_THRESHOLD', 1000))
+# Changes held back by the transaction running in the current thread
+TRANSACTION = threading.local()
 
 
 class Base():
     """ Base class
+
+    Models declare their attributes in attributes, kept in __slots__ with
+    MODELS_SLOTS=1, and timestamps are kept as integer epoch seconds
+    behind the created_at/updated_at datetime properties.
     """
+    attributes = ('id', '_created_at', '_updated_at')
+    if SLOTS:
+        __slots__ = attributes
+    # Secondary indexes, attribute name -> unique
+    indexes = {}
+    # Declared attributes of the model, in declaration order
+    _fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        """ Collect the declared attributes of a model
+        """
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__[:cls.__mro__.index(Base)]):
+            fields.extend(klass.__dict__.get('attributes', ()))
+        cls._fields = tuple(fields)
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
         s_class = str(self.__class__.__name__)
         if DATA.get(s_class) is None:
-            DATA[s_class] = {}
+            DATA.setdefault(s_class, {})
+        if INDEXES.get(s_class) is None:
+            INDEXES.setdefault(s_class,
+                               {attr: {} for attr in self.indexes})
 
         self.id = kwargs.get('id', str(uuid.uuid4()))
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            self._created_at = _parse_timestamp(kwargs.get('created_at'))
         else:
-            self.created_at = datetime.utcnow()
+            self._created_at = int(time.time())
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            self._updated_at = _parse_timestamp(kwargs.get('updated_at'))
         else:
-            self.updated_at = datetime.utcnow()
+            self._updated_at = int(time.time())
+
+    @property
+    def created_at(self) -> datetime:
+        """ Creation time (UTC)
+        """
+        return EPOCH + timedelta(seconds=self._created_at)
+
+    @created_at.setter
+    def created_at(self, value: datetime):
+        """ Set the creation time (UTC)
+        """
+        self._created_at = (value - EPOCH) // timedelta(seconds=1)
+
+    @property
+    def updated_at(self) -> datetime:
+        """ Last update time (UTC)
+        """
+        return EPOCH + timedelta(seconds=self._updated_at)
+
+    @updated_at.setter
+    def updated_at(self, value: datetime):
+        """ Set the last update time (UTC)
+        """
+        self._updated_at = (value - EPOCH) // timedelta(seconds=1)
+
+    def __setattr__(self, name: str, value):
+        """ Keep versions and secondary indexes in sync with stored objects
+        """
+        if STORE is not None:
+            # Objects of a store are copies, saved explicitly
+            super().__setattr__(name, value)
+            return
+        stored = self._is_stored()
+        if stored:
+            _touch(self.__class__.__name__)
+        if name not in self.indexes or not stored:
+            super().__setattr__(name, value)
+            return
+        with self._lock():
+            self._index_check(name, value)
+            self._index_discard(name)
+            super().__setattr__(name, value)
+            self._index_add(name)
+
+    @classmethod
+    def _lock(cls) -> threading.RLock:
+        """ Lock serializing changes to the stored objects of the class
+        """
+        s_class = cls.__name__
+        lock = LOCKS.get(s_class)
+        if lock is None:
+            lock = LOCKS.setdefault(s_class, threading.RLock())
+        return lock
+
+    def _is_stored(self) -> bool:
+        """ Whether this object is the one held in DATA
+        """
+        if STORE is not None:
+            return False
+        s_class = self.__class__.__name__
+        obj_id = getattr(self, 'id', None)
+        return obj_id is not None and DATA.get(s_class, {}).get(obj_id) is self
+
+    def _index_check(self, name: str, value):
+        """ Refuse a value already taken in a unique index
+        """
+        if not self.indexes[name]:
+            return
+        s_class = self.__class__.__name__
+        try:
+            owner = INDEXES[s_class][name].get(value)
+        except TypeError:
+            return
+        if owner is not None and owner != self.id:
+            raise ValueError("{} {} already exists".format(name, value))
+
+    def _index_add(self, name: str):
+        """ Add this object to one secondary index
+        """
+        self._index_put(name, self.id, getattr(self, name, None))
+
+    def _index_discard(self, name: str):
+        """ Remove this object from one secondary index
+        """
+        self._index_pop(name, self.id, getattr(self, name, None))
+
+    @classmethod
+    def _index_put(cls, name: str, obj_id: str, value):
+        """ Add an object ID under value in one secondary index
+        """
+        index = INDEXES[cls.__name__][name]
+        try:
+            if cls.indexes[name]:
+                index[value] = obj_id
+            else:
+                index.setdefault(value, {})[obj_id] = None
+        except TypeError:
+            pass
+
+    @classmethod
+    def _index_pop(cls, name: str, obj_id: str, value):
+        """ Remove an object ID from under value in one secondary index
+        """
+        index = INDEXES[cls.__name__][name]
+        try:
+            if cls.indexes[name]:
+                if index.get(value) == obj_id:
+                    del index[value]
+            else:
+                ids = index.get(value, {})
+                ids.pop(obj_id, None)
+                if not ids:
+                    index.pop(value, None)
+        except TypeError:
+            pass
+
+    @classmethod
+    def _hydrate(cls, obj_id: str) -> TypeVar('Base'):
+        """ Return a stored object, building it if it was lazily loaded
+        """
+        objs = DATA.get(cls.__name__, {})
+        obj = objs.get(obj_id)
+        if isinstance(obj, dict):
+            built = cls(**obj)
+            with cls._lock():
+                if objs.get(obj_id) is obj:
+                    objs[obj_id] = built
+                obj = objs.get(obj_id)
+        return obj
 
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
@@ -47,8 +244,22 @@ class Base():
     def to_json(self, for_serialization: bool = False) -> dict:
         """ Convert the object a JSON dictionary
         """
-        result = {}
-        for key, value in self.__dict__.items():
+        result = {
+            'id': self.id,
+            'created_at': time.strftime(TIMESTAMP_FORMAT,
+                                        time.gmtime(self._created_at)),
+            'updated_at': time.strftime(TIMESTAMP_FORMAT,
+                                        time.gmtime(self._updated_at)),
+        }
+        attributes = [(key, getattr(self, key, _MISSING))
+                      for key in self._fields]
+        attributes.extend((key, value) for key, value
+                          in getattr(self, '__dict__', {}).items()
+                          if key not in Base.attributes
+                          and key not in self._fields)
+        for key, value in attributes:
+            if value is _MISSING:
+                continue
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
@@ -61,52 +272,215 @@ class Base():
     def load_from_file(cls):
         """ Load all objects from file
         """
+        if STORE is not None:
+            STORE.prepare(cls)
+            return
+        cls.flush()
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
-
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+        with cls._lock():
+            _touch(s_class)
+            DATA[s_class] = {}
+            INDEXES[s_class] = {attr: {} for attr in cls.indexes}
+            ORDERS.pop(s_class, None)
+            if path.exists(file_path):
+                with open(file_path, 'r') as f:
+                    objs_json = json.load(f)
+                    if LAZY_LOAD:
+                        DATA[s_class] = objs_json
+                    else:
+                        for obj_id, obj_json in objs_json.items():
+                            DATA[s_class][obj_id] = cls(**obj_json)
+            if STORAGE == 'journal':
+                for record in cls._journal().records():
+                    if record["op"] == "remove":
+                        DATA[s_class].pop(record["id"], None)
+                    elif LAZY_LOAD:
+                        DATA[s_class][record["obj"]["id"]] = record["obj"]
+                    else:
+                        obj = cls(**record["obj"])
+                        DATA[s_class][obj.id] = obj
+            for obj_id, obj in DATA[s_class].items():
+                for attr in cls.indexes:
+                    cls._index_put(attr, obj_id, _stored_value(obj, attr))
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
         """
+        if STORE is not None:
+            return
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        with cls._lock():
+            objs_json = cls._snapshot()
+            with open(file_path, 'w') as f:
+                json.dump(objs_json, f)
+
+    @classmethod
+    def _journal(cls) -> Journal:
+        """ Journal of the class, in journal storage
+        """
+        s_class = cls.__name__
+        if JOURNALS.get(s_class) is None:
+            JOURNALS[s_class] = Journal(s_class, JOURNAL_COMPACT_THRESHOLD)
+        return JOURNALS[s_class]
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def _snapshot(cls) -> dict:
+        """ JSON of all objects of the class
+        """
+        s_class = cls.__name__
+        return {obj_id: obj if isinstance(obj, dict) else obj.to_json(True)
+                for obj_id, obj in dict(DATA.get(s_class, {})).items()}
+
+    @classmethod
+    def _write(cls, records: list):
+        """ Write journal records, or the whole file in file storage
+        """
+        if STORAGE == 'journal':
+            cls._journal().append(records, cls._snapshot)
+        else:
+            cls.save_to_file()
+
+    @classmethod
+    def flush(cls):
+        """ Write all changes batched by the group writer
+        """
+        if STORE is not None:
+            STORE.flush()
+        elif WRITER is not None:
+            WRITER.flush()
+
+    @classmethod
+    @contextmanager
+    def transaction(cls):
+        """ Persist every save and remove of the block in one write
+
+        Changes are applied in memory as they happen and written once,
+        per class, when the outermost transaction of the thread ends.
+        """
+        if STORE is not None:
+            with STORE.transaction():
+                yield
+            return
+        if getattr(TRANSACTION, 'pending', None) is not None:
+            yield
+            return
+        TRANSACTION.pending = {}
+        try:
+            yield
+        finally:
+            pending = TRANSACTION.pending
+            TRANSACTION.pending = None
+            for klass, records in pending.items():
+                batch = None
+                with klass._lock():
+                    if WRITER is None:
+                        klass._write(records)
+                    else:
+                        batch = WRITER.add_many(
+                            klass, records, reserve=DURABILITY == 'group')
+                _wait(batch)
+
+    def _persist(self, op: str) -> int:
+        """ Write a save or remove of this object to storage
+
+        Called under the class lock, so changes reach storage in the order
+        they were made. Return the group writer batch holding the change.
+        """
+        record = None
+        if STORAGE == 'journal' and op == "save":
+            record = {"op": op, "obj": self.to_json(True)}
+        elif STORAGE == 'journal':
+            record = {"op": op, "id": self.id}
+        pending = getattr(TRANSACTION, 'pending', None)
+        if pending is not None:
+            pending.setdefault(self.__class__, []).append(record)
+        elif WRITER is None:
+            self.__class__._write([record])
+        else:
+            return WRITER.add(self.__class__, record,
+                              reserve=DURABILITY == 'group')
+        return None
 
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        if STORE is not None:
+            self._updated_at = int(time.time())
+            STORE.save(self)
+            return
+        with self._lock():
+            self._updated_at = int(time.time())
+            if not self._is_stored():
+                for attr in self.indexes:
+                    self._index_check(attr, getattr(self, attr, None))
+                previous = DATA[s_class].get(self.id)
+                if previous is not None:
+                    for attr in self.indexes:
+                        self._index_pop(attr, self.id,
+                                        _stored_value(previous, attr))
+                DATA[s_class][self.id] = self
+                for attr in self.indexes:
+                    self._index_add(attr)
+                ids = ORDERS.get(s_class)
+                if previous is None and ids is not None:
+                    insort(ids, self.id)
+                _touch(s_class)
+            batch = self._persist("save")
+        _wait(batch)
 
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
+        if STORE is not None:
+            STORE.remove(self)
+            return
+        with self._lock():
+            obj = DATA[s_class].get(self.id)
+            if obj is None:
+                return
+            for attr in self.indexes:
+                self._index_pop(attr, self.id, _stored_value(obj, attr))
             del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+            ids = ORDERS.get(s_class)
+            if ids is not None:
+                position = bisect_left(ids, self.id)
+                if position < len(ids) and ids[position] == self.id:
+                    del ids[position]
+            _touch(s_class)
+            batch = self._persist("remove")
+        _wait(batch)
+
+    @classmethod
+    def version(cls) -> int:
+        """ Counter that changes whenever a stored object changes
+        """
+        if STORE is not None:
+            return STORE.version(cls)
+        return VERSIONS.get(cls.__name__, 0)
+
+    @classmethod
+    def version_tag(cls) -> str:
+        """ Version as a string that is never reused: qualified by the
+        process, or by the store when the objects live in one, so every
+        process sharing the store gives the same tag
+        """
+        if STORE is not None:
+            return "{}-{}".format(STORE.store_id(), STORE.version(cls))
+        return "{}-{}".format(PROCESS_ID, cls.version())
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
+        if STORE is not None:
+            return STORE.count(cls)
         s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        return len(DATA.get(s_class, {}))
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -114,18 +488,44 @@ class Base():
         """
         return cls.search()
 
+    @classmethod
+    def page(cls, after: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ Return up to limit objects ordered by ID, after the ID after
+
+        Creating or removing an object moves the IDs after it in the
+        ordered ID list (a memmove), other changes leave it as it is.
+        """
+        if STORE is not None:
+            return STORE.page(cls, after, limit)
+        s_class = cls.__name__
+        ids = ORDERS.get(s_class)
+        if ids is None:
+            with cls._lock():
+                ids = ORDERS.get(s_class)
+                if ids is None:
+                    ids = sorted(DATA.get(s_class, {}))
+                    ORDERS[s_class] = ids
+        start = 0 if after is None else bisect_right(ids, after)
+        objs = [cls._hydrate(obj_id) for obj_id in ids[start:start + limit]]
+        return [obj for obj in objs if obj is not None]
+
     @classmethod
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
-        s_class = cls.__name__
-        return DATA[s_class].get(id)
+        if STORE is not None:
+            return STORE.get(cls, id)
+        return cls._hydrate(id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
         """
+        if STORE is not None:
+            return STORE.search(cls, attributes)
         s_class = cls.__name__
+
         def _search(obj):
             if len(attributes) == 0:
                 return True
@@ -133,5 +533,63 @@ class Base():
                 if (getattr(obj, k) != v):
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+
+        # Classes without a stored object yet may have no DATA or INDEXES
+        # entry, or only the DATA one, so fall back to a scan without index
+        ids = DATA.get(s_class, {}).keys()
+        index = INDEXES.get(s_class)
+        for k, v in attributes.items():
+            if index is None or k not in index:
+                continue
+            try:
+                ids = index[k].get(v)
+            except TypeError:
+                continue
+            if ids is None:
+                return []
+            if cls.indexes[k]:
+                ids = (ids,)
+            break
+        objs = [cls._hydrate(obj_id) for obj_id in list(ids)]
+        return [obj for obj in objs if obj is not None and _search(obj)]
+
+
+_MISSING = object()
+
+
+def _touch(s_class: str):
+    """ Bump the version of a class
+    """
+    VERSIONS[s_class] = next(VERSION_COUNTER)
+
+
+def _wait(batch: int):
+    """ Wait until a group writer batch is written, in group durability
+    """
+    if batch is not None and DURABILITY == 'group':
+        WRITER.wait(batch, reserved=True)
+
+
+def _parse_timestamp(value: str) -> int:
+    """ Epoch seconds of a TIMESTAMP_FORMAT string
+    """
+    parsed = datetime.fromisoformat(value).replace(microsecond=0)
+    return (parsed - EPOCH) // timedelta(seconds=1)
+
+
+def _stored_value(obj, name: str):
+    """ Attribute of a stored object, or key of its lazily loaded JSON
+    """
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+STORE = None
+if STORAGE in STORES:
+    STORE = STORES[STORAGE](DURABILITY)
+WRITER = None
+if DURABILITY != 'sync' and STORE is None:
+    WRITER = GroupWriter(lambda cls, records: cls._write(records),
+                         FLUSH_INTERVAL, FLUSH_THRESHOLD)
+    atexit.register(WRITER.flush)
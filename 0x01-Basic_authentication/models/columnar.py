@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+""" Columnar module
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, List
+import threading
+import uuid
+
+# Integer column marker of a value kept in the column's dict
+_OTHER = -2 ** 63
+# Free hash index slots
+_EMPTY = -1
+_DELETED = -2
+
+
+class _IdColumn():
+    """ Column of object IDs
+
+    Canonical UUID strings (the IDs Base draws) are kept as their 16
+    bytes, any other ID as it is in a dict.
+    """
+    __slots__ = ('data', 'others')
+
+    def __init__(self):
+        """ Initialize an empty column
+        """
+        self.data = bytearray()
+        self.others = {}
+
+    def grow(self):
+        """ Add a row
+        """
+        self.data += bytes(16)
+
+    def get(self, row: int) -> str:
+        """ ID of a row
+        """
+        other = self.others.get(row)
+        if other is not None:
+            return other
+        h = self.data[row * 16:row * 16 + 16].hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def set(self, row: int, value: str):
+        """ Set the ID of a row
+        """
+        self.others.pop(row, None)
+        try:
+            packed = uuid.UUID(value)
+        except (AttributeError, TypeError, ValueError):
+            packed = None
+        if packed is None or packed.int == 0 or str(packed) != value:
+            self.others[row] = value
+        else:
+            self.data[row * 16:row * 16 + 16] = packed.bytes
+
+    def copy(self) -> '_IdColumn':
+        """ Copy of the column
+        """
+        column = _IdColumn()
+        column.data = bytearray(self.data)
+        column.others = dict(self.others)
+        return column
+
+
+class _IntColumn():
+    """ Column of integers (e.g. epoch timestamps) in a 64-bit array,
+    other values in a dict
+    """
+    __slots__ = ('data', 'others')
+
+    def __init__(self):
+        """ Initialize an empty column
+        """
+        self.data = array('q')
+        self.others = {}
+
+    def grow(self):
+        """ Add a row
+        """
+        self.data.append(_OTHER)
+
+    def get(self, row: int) -> Any:
+        """ Value of a row
+        """
+        value = self.data[row]
+        if value == _OTHER:
+            return self.others.get(row)
+        return value
+
+    def set(self, row: int, value: Any):
+        """ Set the value of a row
+        """
+        self.others.pop(row, None)
+        if type(value) is int and _OTHER < value < 2 ** 63:
+            self.data[row] = value
+            return
+        self.data[row] = _OTHER
+        if value is not None:
+            self.others[row] = value
+
+    def copy(self) -> '_IntColumn':
+        """ Copy of the column
+        """
+        column = _IntColumn()
+        column.data = array('q', self.data)
+        column.others = dict(self.others)
+        return column
+
+
+class _ValueColumn():
+    """ Column of strings packed in one bytearray
+
+    Each row has an offset and a length in the heap and a kind: None, UTF-8
+    text, or lowercase hex text kept as raw bytes at half the size (e.g.
+    password digests). Other values (numbers, lists...) are kept as they
+    are in a dict. Replaced values leave garbage in the heap, compacted
+    once it outweighs the live data.
+    """
+    __slots__ = ('heap', 'offsets', 'lengths', 'kinds', 'others', 'garbage')
+    NONE, TEXT, HEX, OTHER = 0, 1, 2, 3
+
+    def __init__(self):
+        """ Initialize an empty column
+        """
+        self.heap = bytearray()
+        self.offsets = array('q')
+        self.lengths = array('I')
+        self.kinds = bytearray()
+        self.others = {}
+        self.garbage = 0
+
+    def grow(self):
+        """ Add a row
+        """
+        self.offsets.append(0)
+        self.lengths.append(0)
+        self.kinds.append(self.NONE)
+
+    def get(self, row: int) -> Any:
+        """ Value of a row
+        """
+        kind = self.kinds[row]
+        if kind == self.TEXT:
+            offset = self.offsets[row]
+            return self.heap[offset:offset + self.lengths[row]].decode()
+        if kind == self.HEX:
+            offset = self.offsets[row]
+            return self.heap[offset:offset + self.lengths[row]].hex()
+        if kind == self.NONE:
+            return None
+        return self.others[row]
+
+    def set(self, row: int, value: Any):
+        """ Set the value of a row
+        """
+        self.clear(row)
+        if value is None:
+            return
+        data = None
+        if type(value) is str:
+            if len(value) >= 16 and len(value) % 2 == 0:
+                try:
+                    data = bytes.fromhex(value)
+                    kind = self.HEX if data.hex() == value else None
+                except ValueError:
+                    data = None
+            if data is None or kind is None:
+                try:
+                    data = value.encode()
+                    kind = self.TEXT
+                except UnicodeEncodeError:
+                    data = None
+        if data is None:
+            self.others[row] = value
+            self.kinds[row] = self.OTHER
+            return
+        self.offsets[row] = len(self.heap)
+        self.lengths[row] = len(data)
+        self.kinds[row] = kind
+        self.heap += data
+
+    def clear(self, row: int):
+        """ Set a row to None
+        """
+        kind = self.kinds[row]
+        if kind == self.TEXT or kind == self.HEX:
+            self.garbage += self.lengths[row]
+            if self.garbage > 1 << 16 and self.garbage * 2 > len(self.heap):
+                self.kinds[row] = self.NONE
+                self._compact()
+        elif kind == self.OTHER:
+            del self.others[row]
+        self.kinds[row] = self.NONE
+
+    def _compact(self):
+        """ Rewrite the heap without garbage
+        """
+        heap = bytearray()
+        offsets = self.offsets
+        lengths = self.lengths
+        for row, kind in enumerate(self.kinds):
+            if kind == self.TEXT or kind == self.HEX:
+                offset = offsets[row]
+                offsets[row] = len(heap)
+                heap += self.heap[offset:offset + lengths[row]]
+        self.heap = heap
+        self.garbage = 0
+
+    def copy(self) -> '_ValueColumn':
+        """ Copy of the column
+        """
+        column = _ValueColumn()
+        column.heap = bytearray(self.heap)
+        column.offsets = array('q', self.offsets)
+        column.lengths = array('I', self.lengths)
+        column.kinds = bytearray(self.kinds)
+        column.others = dict(self.others)
+        column.garbage = self.garbage
+        return column
+
+
+class _HashIndex():
+    """ Open addressing hash table from the values of a column to rows
+
+    Slots hold a row number (or _EMPTY / _DELETED) next to the low 32 bits
+    of the hash of its value, so probes compare hashes before values and
+    growing never reads the column. A value shared by several rows takes
+    one slot per row. Unhashable values raise TypeError.
+    """
+    __slots__ = ('value', 'rows', 'hashes', 'used', 'size')
+
+    def __init__(self, value: Callable[[int], Any]):
+        """ Initialize an empty index over the value of each row
+        """
+        self.value = value
+        self.rows = array('i', [_EMPTY]) * 8
+        self.hashes = array('I', [0]) * 8
+        self.used = 0
+        self.size = 0
+
+    def find(self, value: Any, first: bool = False) -> List[int]:
+        """ Rows holding a value, only the first one found if first
+        """
+        h = hash(value) & 0xFFFFFFFF
+        rows = self.rows
+        hashes = self.hashes
+        mask = len(rows) - 1
+        i = h & mask
+        found = []
+        while True:
+            row = rows[i]
+            if row == _EMPTY:
+                return found
+            if row >= 0 and hashes[i] == h and self.value(row) == value:
+                found.append(row)
+                if first:
+                    return found
+            i = (i + 1) & mask
+
+    def add(self, row: int, value: Any):
+        """ Add a row under its value
+        """
+        h = hash(value) & 0xFFFFFFFF
+        if (self.used + 1) * 2 > len(self.rows):
+            self._resize()
+        rows = self.rows
+        mask = len(rows) - 1
+        i = h & mask
+        while rows[i] >= 0:
+            i = (i + 1) & mask
+        if rows[i] == _EMPTY:
+            self.used += 1
+        rows[i] = row
+        self.hashes[i] = h
+        self.size += 1
+
+    def discard(self, row: int, value: Any):
+        """ Remove a row from under its value
+        """
+        h = hash(value) & 0xFFFFFFFF
+        rows = self.rows
+        mask = len(rows) - 1
+        i = h & mask
+        while rows[i] != _EMPTY:
+            if rows[i] == row:
+                rows[i] = _DELETED
+                self.size -= 1
+                return
+            i = (i + 1) & mask
+
+    def _resize(self):
+        """ Rebuild the table without deleted slots, at most a third full
+        """
+        capacity = 8
+        while capacity < (self.size + 1) * 3:
+            capacity *= 2
+        old_rows = self.rows
+        old_hashes = self.hashes
+        rows = array('i', [_EMPTY]) * capacity
+        hashes = array('I', [0]) * capacity
+        mask = capacity - 1
+        for j, row in enumerate(old_rows):
+            if row < 0:
+                continue
+            h = old_hashes[j]
+            i = h & mask
+            while rows[i] != _EMPTY:
+                i = (i + 1) & mask
+            rows[i] = row
+            hashes[i] = h
+        self.rows = rows
+        self.hashes = hashes
+        self.used = self.size
+
+
+class Table():
+    """ Objects of one model class, stored column by column
+
+    A row holds the ID, the created_at/updated_at epoch timestamps and one
+    value per slot attribute of the model, each in a column packed into
+    arrays and byte strings instead of one object per row. The ID and the
+    model's secondary indexes are hash indexes of row numbers; the sorted
+    IDs and their rows, in a parallel array, are kept for paging once
+    first asked for. Rows of removed
+    objects are reused. Callers serialize access with the table lock.
+    """
+
+    def __init__(self, fields: tuple, indexes: dict):
+        """ Initialize an empty table
+        Args:
+            fields (tuple): The slot attributes of the model.
+            indexes (dict): The indexed attributes -> unique.
+        """
+        self.lock = threading.RLock()
+        self.fields = fields
+        self.ids = _IdColumn()
+        self.columns = {'_created_at': _IntColumn(),
+                        '_updated_at': _IntColumn()}
+        for field in fields:
+            self.columns[field] = _ValueColumn()
+        self.live = bytearray()
+        self.free = array('i')
+        self.size = 0
+        self.by_id = _HashIndex(self.ids.get)
+        self.indexes = {name: (unique, _HashIndex(self.columns[name].get))
+                        for name, unique in indexes.items()
+                        if name in fields}
+        self.order = None
+        self.order_ids = None
+
+    def __len__(self) -> int:
+        """ Number of rows
+        """
+        return self.size
+
+    def row(self, obj_id: str) -> int:
+        """ Row of an ID, -1 if none
+        """
+        try:
+            rows = self.by_id.find(obj_id, True)
+        except TypeError:
+            return -1
+        return rows[0] if rows else -1
+
+    def rows(self) -> List[int]:
+        """ Every row, in storage order
+        """
+        return [row for row, live in enumerate(self.live) if live]
+
+    def values(self, row: int) -> dict:
+        """ Attribute name -> value of a row
+        """
+        values = {'id': self.ids.get(row)}
+        for name, column in self.columns.items():
+            values[name] = column.get(row)
+        return values
+
+    def find(self, name: str, value: Any) -> List[int]:
+        """ Rows whose attribute holds a value, through its index if any
+        """
+        if name == 'id':
+            row = self.row(value)
+            return [row] if row >= 0 else []
+        index = self.indexes.get(name)
+        if index is not None:
+            try:
+                return index[1].find(value, index[0])
+            except TypeError:
+                pass
+        column = self.columns[name]
+        return [row for row in self.rows() if column.get(row) == value]
+
+    def put(self, obj: Any):
+        """ Insert or update the row of an object, by its id attribute
+        Raises:
+            ValueError: If a unique indexed attribute is already taken.
+        """
+        obj_id = obj.id
+        row = self.row(obj_id)
+        new = {name: getattr(obj, name, None) for name in self.columns}
+        for name, (unique, index) in self.indexes.items():
+            if not unique:
+                continue
+            try:
+                owners = index.find(new[name], True)
+            except TypeError:
+                continue
+            if owners and owners[0] != row:
+                raise ValueError("{} {} already exists".format(
+                    name, new[name]))
+        if row < 0:
+            row = self._insert(obj_id)
+            old = dict.fromkeys(self.indexes, _MISSING)
+        else:
+            old = {name: self.columns[name].get(row)
+                   for name in self.indexes}
+        for name, value in new.items():
+            self.columns[name].set(row, value)
+        for name, (_, index) in self.indexes.items():
+            if old[name] is not _MISSING and old[name] == new[name]:
+                continue
+            if old[name] is not _MISSING:
+                self._discard(index, row, old[name])
+            try:
+                index.add(row, new[name])
+            except TypeError:
+                pass
+
+    def delete(self, obj_id: str) -> bool:
+        """ Remove the row of an ID, return whether there was one
+        """
+        row = self.row(obj_id)
+        if row < 0:
+            return False
+        for name, (_, index) in self.indexes.items():
+            self._discard(index, row, self.columns[name].get(row))
+        if self.order is not None:
+            position = bisect_left(self.order_ids, obj_id)
+            if position < len(self.order) and self.order[position] == row:
+                del self.order[position]
+                del self.order_ids[position]
+        self.by_id.discard(row, obj_id)
+        for column in self.columns.values():
+            column.set(row, None)
+        self.live[row] = 0
+        self.free.append(row)
+        self.size -= 1
+        return True
+
+    def page(self, after: str, limit: int) -> List[int]:
+        """ Up to limit rows ordered by ID, after the ID after if not None
+        """
+        if self.order is None:
+            pairs = sorted((self.ids.get(row), row) for row in self.rows())
+            self.order_ids = [obj_id for obj_id, _ in pairs]
+            self.order = array('i', [row for _, row in pairs])
+        start = 0
+        if after is not None:
+            start = bisect_right(self.order_ids, after)
+        return list(self.order[start:start + limit])
+
+    def copy(self) -> 'Table':
+        """ Copy of the rows, without indexes, to read them unlocked
+        """
+        table = Table.__new__(Table)
+        table.lock = None
+        table.fields = self.fields
+        table.ids = self.ids.copy()
+        table.columns = {name: column.copy()
+                         for name, column in self.columns.items()}
+        table.live = bytearray(self.live)
+        table.free = array('i')
+        table.size = self.size
+        table.by_id = None
+        table.indexes = {}
+        table.order = None
+        table.order_ids = None
+        return table
+
+    def _insert(self, obj_id: str) -> int:
+        """ Take a free row, or add one, for an ID
+        """
+        if self.free:
+            row = self.free.pop()
+        else:
+            row = len(self.live)
+            self.live.append(0)
+            self.ids.grow()
+            for column in self.columns.values():
+                column.grow()
+        self.live[row] = 1
+        self.ids.set(row, obj_id)
+        self.by_id.add(row, obj_id)
+        if self.order is not None:
+            position = bisect_right(self.order_ids, obj_id)
+            self.order_ids.insert(position, obj_id)
+            self.order.insert(position, row)
+        self.size += 1
+        return row
+
+    @staticmethod
+    def _discard(index: _HashIndex, row: int, value: Any):
+        """ Remove a row from an index, if its value was hashable
+        """
+        try:
+            index.discard(row, value)
+        except TypeError:
+            pass
+
+
+_MISSING = object()
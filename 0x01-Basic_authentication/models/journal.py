@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+""" Journal module
+"""
+from typing import Callable, Iterator, List
+from os import path
+import json
+import os
+import threading
+
+
+def write_snapshot(file_path: str, objs_json: dict):
+    """ Atomically replace a JSON snapshot file
+    """
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(objs_json, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+
+class Journal():
+    """ Append-only log of object changes on top of a JSON snapshot
+
+    Each record is one JSON line: {"op": "save", "obj": {...}} or
+    {"op": "remove", "id": ...}. Once compact_threshold records have been
+    appended, a background thread rotates the journal to <journal>.old,
+    rewrites the snapshot and deletes the rotated file. Loading replays
+    the snapshot, then <journal>.old if a compaction was interrupted, then
+    the journal; records are whole-object upserts or removals, so
+    replaying a rotated journal over a newer snapshot is harmless.
+    """
+
+    def __init__(self, s_class: str, compact_threshold: int = 10000):
+        """ Initialize the journal of a class
+        """
+        self.snapshot_path = ".db_{}.json".format(s_class)
+        self.path = ".db_{}.journal".format(s_class)
+        self.old_path = self.path + ".old"
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._file = None
+        self._records = 0
+        self._compacting = False
+
+    def records(self) -> Iterator[dict]:
+        """ Replay the rotated journal then the journal
+        """
+        with self._lock:
+            self._close()
+        self._records = 0
+        for file_path in (self.old_path, self.path):
+            if not path.exists(file_path):
+                continue
+            with open(file_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash
+                        continue
+                    self._records += 1
+                    yield record
+
+    def append(self, records: List[dict], snapshot: Callable[[], dict]):
+        """ Durably append records, compacting when the journal is long
+
+        snapshot returns the JSON of every object; it is called under the
+        journal lock so no record lands between it and the rotation.
+        """
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        with self._lock:
+            self._open()
+            self._file.write(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._records += len(records)
+            compact = (self._records >= self.compact_threshold and
+                       not self._compacting)
+            if compact:
+                self._compacting = True
+        if compact:
+            threading.Thread(target=self.compact, args=(snapshot,),
+                             daemon=True).start()
+
+    def compact(self, snapshot: Callable[[], dict]):
+        """ Fold the journal into the snapshot
+        """
+        try:
+            with self._lock:
+                objs_json = snapshot()
+                self._close()
+                if path.exists(self.old_path):
+                    # An earlier compaction was interrupted
+                    if path.exists(self.path):
+                        with open(self.old_path, 'a') as old, \
+                                open(self.path, 'r') as current:
+                            old.write(current.read())
+                        os.remove(self.path)
+                elif path.exists(self.path):
+                    os.replace(self.path, self.old_path)
+                self._records = 0
+            write_snapshot(self.snapshot_path, objs_json)
+            if path.exists(self.old_path):
+                os.remove(self.old_path)
+        finally:
+            self._compacting = False
+
+    def _open(self):
+        """ Open the journal for appending, ending any torn last line
+        """
+        if self._file is not None:
+            return
+        torn = False
+        if path.exists(self.path) and path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        self._file = open(self.path, 'a')
+        if torn:
+            self._file.write("\n")
+
+    def _close(self):
+        """ Close the journal file
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -2,12 +2,16 @@
 """ User module
 """
 import hashlib
-from models.base import Base
+from models.base import Base, SLOTS
 
 
 class User(Base):
     """ User class
     """
+    attributes = ('email', '_password', 'first_name', 'last_name')
+    if SLOTS:
+        __slots__ = attributes
+    indexes = {'email': False}
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
@@ -16,6 +16,9 @@ CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
 
 auth = None
 auth_type = getenv('AUTH_TYPE')
+# Paths served without authentication
+EXCLUDED_PATHS = ('/api/v1/status/', '/api/v1/unauthorized/',
+                  '/api/v1/forbidden/', '/api/v1/auth_session/login/')
 
 
 if auth_type == 'basic_auth':
@@ -79,9 +82,7 @@ def before_request():
     """
     if auth is None:
         return
-    excluded_paths = ['/api/v1/status/', '/api/v1/unauthorized/',
-                      '/api/v1/forbidden/', '/api/v1/auth_session/login/']
-    if not auth.require_auth(request.path, excluded_paths):
+    if not auth.require_auth(request.path, EXCLUDED_PATHS):
         return
     if (auth.authorization_header(request) is None and
             auth.session_cookie(request) is None):
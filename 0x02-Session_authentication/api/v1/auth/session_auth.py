@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """A session authentication class"""
 import uuid
+from os import getenv
 from api.v1.auth.auth import Auth
+from api.v1.auth.session_store import SessionStore
 from models.user import User
 
 
@@ -9,7 +11,9 @@ class SessionAuth(Auth):
     """
     SessionAuth class that inherits from Auth.
     """
-    user_id_by_session_id = {}
+    user_id_by_session_id = SessionStore(
+        int(getenv('SESSION_STORE_SHARDS', 16)),
+        int(getenv('SESSION_STORE_MAX_SIZE', 0)))
 
     def create_session(self, user_id: str = None) -> str:
         """
@@ -65,5 +69,5 @@ class SessionAuth(Auth):
         user_id = self.user_id_for_session_id(session_id)
         if user_id is None:
             return False
-        del self.user_id_by_session_id[session_id]
+        self.user_id_by_session_id.pop(session_id, None)
         return True
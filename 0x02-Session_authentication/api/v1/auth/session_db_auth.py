@@ -1,68 +1,124 @@
 #!/usr/bin/env python3
 """
-SessionExpAuth module for managing session expiration.
+SessionDBAuth module for sessions stored in the database.
 """
 
 from datetime import datetime, timedelta
-from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.session_exp_auth import SessionExpAuth
+from api.v1.auth.session_store import SessionStore
+from models.user_session import UserSession
 import os
+import threading
+import time
+import uuid
 
 
-class SessionExpAuth(SessionAuth):
+class SessionDBAuth(SessionExpAuth):
     """
-    SessionExpAuth class for managing session expiration.
+    SessionDBAuth class for sessions persisted as UserSession objects.
+
+    Sessions survive restarts, and are shared between workers with a
+    shared store (MODELS_STORAGE=sqlite). Lookups go through a read-through
+    cache of (user_id, created_at) per session ID, so a request only reads
+    the store on a cache miss; entries live SESSION_DB_CACHE_TTL seconds,
+    which bounds how long a logout in another worker goes unnoticed.
+    Expired sessions are deleted in bulk by a background thread every
+    SESSION_PURGE_INTERVAL seconds.
     """
+    session_cache = SessionStore(
+        max_size=int(os.getenv('SESSION_DB_CACHE_SIZE', 10000)))
 
     def __init__(self):
         """
-        Initialize the session duration from an environment variable.
+        Load the stored sessions and start the purge of expired ones.
         """
-        session_duration = os.getenv("SESSION_DURATION")
-        try:
-            self.session_duration = int(session_duration)
-        except (TypeError, ValueError):
-            self.session_duration = 0
+        super().__init__()
+        self.cache_ttl = float(os.getenv('SESSION_DB_CACHE_TTL', 5))
+        self.purge_interval = float(os.getenv('SESSION_PURGE_INTERVAL', 60))
+        UserSession.load_from_file()
+        if self.session_duration > 0:
+            threading.Thread(target=self._purge_loop, daemon=True).start()
 
     def create_session(self, user_id=None):
         """
-        Create a new session with an expiration date.
+        Create and store a UserSession for a user.
         """
-        session_id = super().create_session(user_id)
-        if session_id is None:
+        if user_id is None or not isinstance(user_id, str):
             return None
-        session_data = {
-            "user_id": user_id,
-            "created_at": datetime.now()
-        }
-        self.user_id_by_session_id[session_id] = session_data
+        session_id = str(uuid.uuid4())
+        user_session = UserSession(user_id=user_id, session_id=session_id)
+        user_session.save()
+        self._cache(session_id, (user_id, user_session.created_at))
         return session_id
 
     def user_id_for_session_id(self, session_id=None):
         """
-        Return the user_id if the session_id exists and is not expired.
+        Return the user_id of a stored session if it is not expired.
         """
-        if session_id is None or session_id not in self.user_id_by_session_id:
-            return None
-        session_data = self.user_id_by_session_id.get(session_id)
-        if session_data is None:
-            return None
-        if self.session_duration <= 0:
-            return session_data.get("user_id")
-        created_at = session_data.get("created_at")
-        if created_at is None:
+        if session_id is None or not isinstance(session_id, str):
             return None
-        if (datetime.now() - created_at).seconds > self.session_duration:
-            return None
-        return session_data.get("user_id")
+        cached = self.session_cache.get(session_id)
+        if cached is None:
+            user_sessions = UserSession.search({'session_id': session_id})
+            if not user_sessions:
+                return None
+            user_session = user_sessions[0]
+            cached = (user_session.user_id, user_session.created_at)
+            self._cache(session_id, cached)
+        user_id, created_at = cached
+        if self.session_duration > 0:
+            expires_at = created_at + timedelta(seconds=self.session_duration)
+            if expires_at < datetime.utcnow():
+                return None
+        return user_id
+
+    def _cache(self, session_id, cached):
+        """
+        Cache the (user_id, created_at) of a session, unless the cache TTL
+        is 0.
+        """
+        if self.cache_ttl > 0:
+            self.session_cache.set(session_id, cached, self.cache_ttl)
 
     def destroy_session(self, request=None):
         """
-        Destroy the session for a user.
+        Destroy the stored session of a request.
         """
         session_id = self.session_cookie(request)
         if session_id is None:
             return False
-        if session_id in self.user_id_by_session_id:
-            del self.user_id_by_session_id[session_id]
-            return True
-        return False
+        self.session_cache.pop(session_id)
+        user_sessions = UserSession.search({'session_id': session_id})
+        if not user_sessions:
+            return False
+        user_sessions[0].remove()
+        return True
+
+    def purge_expired(self) -> int:
+        """
+        Delete every expired session, with one write to the store.
+        Returns:
+            int: The number of deleted sessions.
+        """
+        if self.session_duration <= 0:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(seconds=self.session_duration)
+        expired = [user_session for user_session in UserSession.all()
+                   if user_session.created_at < cutoff]
+        with UserSession.transaction():
+            for user_session in expired:
+                user_session.remove()
+                self.session_cache.pop(user_session.session_id)
+        return len(expired)
+
+    def _purge_loop(self):
+        """
+        Purge loop of the background thread.
+        """
+        while True:
+            time.sleep(self.purge_interval)
+            try:
+                self.purge_expired()
+            except Exception:
+                # Retried on the next round
+                pass
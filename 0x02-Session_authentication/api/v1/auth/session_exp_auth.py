@@ -8,7 +8,7 @@ from api.v1.auth.session_auth import SessionAuth
 
 class SessionExpAuth(SessionAuth):
     """Authenticates the session expiration"""
-     def __init__(self):
+    def __init__(self):
         """Initialize the session duration from environment variable."""
         super().__init__()
         try:
@@ -17,7 +17,7 @@ class SessionExpAuth(SessionAuth):
             self.session_duration = 0
 
     def create_session(self, user_id=None):
-        """Create a session with expiration."""
+        """Create a session with expiration, evicted once expired."""
         session_id = super().create_session(user_id)
         if session_id is None:
             return None
@@ -25,10 +25,11 @@ class SessionExpAuth(SessionAuth):
             'user_id': user_id,
             'created_at': datetime.now()
         }
-        self.user_id_by_session_id[session_id] = session_info
+        self.user_id_by_session_id.set(session_id, session_info,
+                                       max(self.session_duration, 0))
         return session_id
 
-     def user_id_for_session_id(self, session_id=None):
+    def user_id_for_session_id(self, session_id=None):
         """Return user_id if session_id is valid and not expired."""
         if session_id is None:
             return None
@@ -40,6 +41,7 @@ class SessionExpAuth(SessionAuth):
         created_at = session_info.get('created_at')
         if created_at is None:
             return None
-        if created_at + timedelta(seconds=self.session_duration) < datetime.now():
+        expires_at = created_at + timedelta(seconds=self.session_duration)
+        if expires_at < datetime.now():
             return None
         return session_info.get('user_id')
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Session store module
+"""
+import heapq
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class _Shard:
+    """
+    One shard of a SessionStore: its lock, its entries in LRU order, a
+    heap of their expiry times and its counters.
+    """
+    __slots__ = ('lock', 'entries', 'heap', 'hits', 'misses', 'expired',
+                 'evicted')
+
+    def __init__(self):
+        """
+        Initialize an empty shard.
+        """
+        self.lock = threading.Lock()
+        # session_id -> (value, expires_at or None), least recent first
+        self.entries = OrderedDict()
+        # (expires_at, session_id), may hold stale pairs of replaced or
+        # deleted entries, which are skipped
+        self.heap = []
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+
+class SessionStore:
+    """
+    Sharded in-memory session store with expiry and a maximum size.
+
+    Session IDs are spread over shards, each with its own lock, so
+    concurrent requests rarely contend. Entries may carry a time to live:
+    expired entries are never returned, and are evicted from the heap of
+    their shard on each write and by a background sweep every
+    sweep_interval seconds. Past max_size entries (0 for no limit) the
+    least recently used entry of the shard is evicted.
+
+    The store behaves as a dict for SessionAuth: store[session_id],
+    get(), `in`, del, pop(), iteration, keys(), items() and its repr.
+    """
+    def __init__(self, shards: int = 16, max_size: int = 0,
+                 sweep_interval: float = 1.0):
+        """
+        Initialize the store, the sweep thread starts with the first
+        entry that expires.
+        Args:
+            shards (int): The number of shards.
+            max_size (int): The maximum number of entries, 0 for none.
+            sweep_interval (float): The seconds between sweeps.
+        """
+        self.shards = [_Shard() for _ in range(max(1, shards))]
+        self.max_size = max_size
+        self.sweep_interval = sweep_interval
+        self._shard_max = 0
+        if max_size > 0:
+            self._shard_max = -(-max_size // len(self.shards))
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _shard(self, session_id: str) -> _Shard:
+        """
+        Shard holding a session ID.
+        """
+        return self.shards[hash(session_id) % len(self.shards)]
+
+    def set(self, session_id: str, value: Any, ttl: float = None):
+        """
+        Store a value for a session ID.
+        Args:
+            session_id (str): The session ID.
+            value (Any): The value, e.g. the user ID.
+            ttl (float): The seconds before the entry expires, None or 0
+            for never.
+        """
+        now = time.monotonic()
+        expires_at = now + ttl if ttl else None
+        shard = self._shard(session_id)
+        with shard.lock:
+            self._expire(shard, now)
+            shard.entries[session_id] = (value, expires_at)
+            shard.entries.move_to_end(session_id)
+            if expires_at is not None:
+                heapq.heappush(shard.heap, (expires_at, session_id))
+            if self._shard_max:
+                while len(shard.entries) > self._shard_max:
+                    shard.entries.popitem(last=False)
+                    shard.evicted += 1
+            if len(shard.heap) > 2 * len(shard.entries) + 64:
+                # Mostly stale pairs of replaced or deleted entries
+                shard.heap = [(entry[1], key)
+                              for key, entry in shard.entries.items()
+                              if entry[1] is not None]
+                heapq.heapify(shard.heap)
+        if expires_at is not None and self._thread is None:
+            self._start()
+
+    def get(self, session_id: str, default: Any = None) -> Any:
+        """
+        Retrieve the value of a live session ID.
+        Args:
+            session_id (str): The session ID.
+            default (Any): The value returned if missing or expired.
+        Returns:
+            Any: The value of the session.
+        """
+        shard = self._shard(session_id)
+        with shard.lock:
+            entry = shard.entries.get(session_id)
+            if entry is None:
+                shard.misses += 1
+                return default
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                del shard.entries[session_id]
+                shard.expired += 1
+                shard.misses += 1
+                return default
+            shard.entries.move_to_end(session_id)
+            shard.hits += 1
+            return entry[0]
+
+    def pop(self, session_id: str, default: Any = None) -> Any:
+        """
+        Remove a session ID and return its value.
+        Args:
+            session_id (str): The session ID.
+            default (Any): The value returned if missing.
+        Returns:
+            Any: The value of the removed session.
+        """
+        shard = self._shard(session_id)
+        with shard.lock:
+            entry = shard.entries.pop(session_id, None)
+        return default if entry is None else entry[0]
+
+    def __setitem__(self, session_id: str, value: Any):
+        """
+        Store a value for a session ID, without expiry.
+        """
+        self.set(session_id, value)
+
+    def __getitem__(self, session_id: str) -> Any:
+        """
+        Retrieve the value of a live session ID, raise KeyError if none.
+        """
+        value = self.get(session_id, _MISSING)
+        if value is _MISSING:
+            raise KeyError(session_id)
+        return value
+
+    def __delitem__(self, session_id: str):
+        """
+        Remove a session ID, raise KeyError if missing.
+        """
+        if self.pop(session_id, _MISSING) is _MISSING:
+            raise KeyError(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        """
+        Whether a session ID is live.
+        """
+        return self.get(session_id, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        """
+        Number of entries, expired ones not swept yet included.
+        """
+        return sum(len(shard.entries) for shard in self.shards)
+
+    def items(self) -> list:
+        """
+        Snapshot of the live (session ID, value) pairs.
+        """
+        now = time.monotonic()
+        items = []
+        for shard in self.shards:
+            with shard.lock:
+                items.extend((session_id, entry[0])
+                             for session_id, entry in shard.entries.items()
+                             if entry[1] is None or entry[1] > now)
+        return items
+
+    def keys(self) -> list:
+        """
+        Snapshot of the live session IDs.
+        """
+        return [session_id for session_id, _ in self.items()]
+
+    def __iter__(self):
+        """
+        Iterate over a snapshot of the live session IDs.
+        """
+        return iter(self.keys())
+
+    def __repr__(self) -> str:
+        """
+        The live entries, as a dict.
+        """
+        return repr(dict(self.items()))
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        for shard in self.shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.heap = []
+
+    def _expire(self, shard: _Shard, now: float):
+        """
+        Evict the expired entries of a shard, under its lock.
+        """
+        heap = shard.heap
+        while heap and heap[0][0] <= now:
+            expires_at, session_id = heapq.heappop(heap)
+            entry = shard.entries.get(session_id)
+            if entry is not None and entry[1] == expires_at:
+                del shard.entries[session_id]
+                shard.expired += 1
+
+    def sweep(self):
+        """
+        Evict the expired entries of every shard.
+        """
+        now = time.monotonic()
+        for shard in self.shards:
+            with shard.lock:
+                self._expire(shard, now)
+
+    def _start(self):
+        """
+        Start the background sweep thread once.
+        """
+        with self._thread_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """
+        Sweep loop of the background thread.
+        """
+        while True:
+            time.sleep(self.sweep_interval)
+            self.sweep()
+
+    def stats(self) -> dict:
+        """
+        Report the size, limits, counters and approximate memory use.
+        Returns:
+            dict: The metrics, memory in bytes.
+        """
+        stats = {'size': 0, 'max_size': self.max_size,
+                 'shards': len(self.shards), 'hits': 0, 'misses': 0,
+                 'expired': 0, 'evicted': 0, 'memory': 0}
+        for shard in self.shards:
+            with shard.lock:
+                stats['size'] += len(shard.entries)
+                stats['memory'] += sys.getsizeof(shard.entries) + \
+                    sys.getsizeof(shard.heap) + \
+                    sum(sys.getsizeof(key) + sys.getsizeof(entry)
+                        for key, entry in shard.entries.items())
+                for counter in ('hits', 'misses', 'expired', 'evicted'):
+                    stats[counter] += getattr(shard, counter)
+        return stats
+
+
+_MISSING = object()
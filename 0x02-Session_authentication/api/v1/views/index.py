@@ -19,10 +19,23 @@ def stats() -> str:
     """ GET /api/v1/stats
     Return:
       - the number of each objects
+      - the verified credentials cache counters, with Basic auth
+      - the session store metrics, with session auth, or the session
+        cache metrics with SessionDBAuth
     """
     from models.user import User
+    from api.v1.app import auth
     stats = {}
     stats['users'] = User.count()
+    cache = getattr(auth, 'credential_cache', None)
+    if cache is not None:
+        stats['basic_auth_cache'] = cache.stats()
+    session_cache = getattr(auth, 'session_cache', None)
+    sessions = getattr(auth, 'user_id_by_session_id', None)
+    if hasattr(session_cache, 'stats'):
+        stats['session_db_auth'] = session_cache.stats()
+    elif hasattr(sessions, 'stats'):
+        stats['sessions'] = sessions.stats()
     return jsonify(stats)
 
 
@@ -3,7 +3,8 @@
 Session Authentication views
 """
 
-from flask import Blueprint, request, jsonify, make_response
+from os import getenv
+from flask import Blueprint, abort, request, jsonify, make_response
 from models.user import User
 
 
@@ -11,8 +12,8 @@ session_auth_views = Blueprint('session_auth_views', __name__,
                                url_prefix='/auth_session')
 
 
-@session_auth_views.route('/auth_session/login', methods=['POST'],
-                           strict_slashes=False)
+@session_auth_views.route('/login', methods=['POST'],
+                          strict_slashes=False)
 def login():
     """
     Handles POST requests to /auth_session/login.
@@ -25,9 +26,10 @@ def login():
         return jsonify({"error": "email missing"}), 400
     if not password:
         return jsonify({"error": "password missing"}), 400
-    user = User.search(email=email)
-    if user is None:
+    users = User.search({'email': email})
+    if not users:
         return jsonify({"error": "no user found for this email"}), 404
+    user = users[0]
     if not user.is_valid_password(password):
         return jsonify({"error": "wrong password"}), 401
     session_id = auth.create_session(user.id)
@@ -37,10 +39,11 @@ def login():
     return response
 
 
-@session_auth_views.route('/auth_session/logout', methods=['DELETE'],
+@session_auth_views.route('/logout', methods=['DELETE'],
                           strict_slashes=False)
 def logout():
     """Handles user logout"""
+    from api.v1.app import auth
     if not auth.destroy_session(request):
         abort(404)
     return jsonify({}), 200
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+""" Main 10
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+if len(sys.argv) > 2:
+    from api.v1.auth.session_db_auth import SessionDBAuth
+
+    auth = SessionDBAuth()
+    count = int(sys.argv[2])
+    session_ids = [auth.create_session("user{}".format(i))
+                   for i in range(count)]
+    for ttl in (0, 5):
+        auth.cache_ttl = ttl
+        auth.session_cache.clear()
+        start = time.perf_counter()
+        for _ in range(5):
+            for session_id in session_ids:
+                auth.user_id_for_session_id(session_id)
+        print("{}, cache TTL {}s: {:.1f} us/lookup".format(
+            sys.argv[1], ttl,
+            1e6 * (time.perf_counter() - start) / (5 * count)))
+    sys.exit(0)
+
+count = sys.argv[1] if len(sys.argv) > 1 else "2000"
+here = os.path.dirname(os.path.abspath(__file__))
+for storage in ("file", "sqlite"):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, MODELS_STORAGE=storage, PYTHONPATH=here,
+                   MODELS_DURABILITY="async", SESSION_DURATION="3600")
+        subprocess.run([sys.executable, os.path.join(here, "main_10.py"),
+                        storage, count], cwd=tmp, env=env, check=True)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+""" Main 11
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+if len(sys.argv) > 1:
+    from models.user import User
+
+    # No User stored yet: search before any instance exists
+    print(User.search({'email': "bob@hbtn.io"}), User.count())
+
+    from api.v1.app import app
+
+    client = app.test_client()
+    form = {'email': "bob@hbtn.io", 'password': "pwd"}
+    response = client.post("/api/v1/auth_session/login", data=form)
+    print(response.status_code, response.get_json())
+
+    user = User(email="bob@hbtn.io")
+    user.password = "pwd"
+    user.save()
+    response = client.post("/api/v1/auth_session/login", data=form)
+    print(response.status_code, response.get_json()['email'])
+    sys.exit(0)
+
+here = os.path.dirname(os.path.abspath(__file__))
+with tempfile.TemporaryDirectory() as tmp:
+    env = dict(os.environ, AUTH_TYPE="session_auth", PYTHONPATH=here,
+               SESSION_NAME="_my_session_id")
+    subprocess.run([sys.executable, os.path.join(here, "main_11.py"),
+                    "child"], cwd=tmp, env=env, check=True)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+""" Main 12
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+if len(sys.argv) > 2:
+    from models.user import User
+
+    User.load_from_file()
+    count = int(sys.argv[2])
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    ids = []
+    for i in range(count):
+        user = User(email="user{}@hbtn.io".format(i),
+                    first_name="First{}".format(i))
+        user.password = "pwd{}".format(i)
+        user.save()
+        ids.append(user.id)
+    User.flush()
+    # Serializing must not grow what the storage keeps
+    for user in User.all():
+        user.to_json()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # IDs kept by this script, not by the storage
+    size -= sys.getsizeof(ids) + sum(sys.getsizeof(obj_id)
+                                     for obj_id in ids)
+    start = time.perf_counter()
+    for obj_id in ids[:10000]:
+        User.get(obj_id)
+    got = time.perf_counter()
+    for i in range(10000):
+        User.search({'email': "user{}@hbtn.io".format(i)})
+    searched = time.perf_counter()
+    print("{}: {:.0f} bytes/user, get {:.1f} us, search by email "
+          "{:.1f} us".format(sys.argv[1], size / count,
+                             (got - start) * 100, (searched - got) * 100))
+    sys.exit(0)
+
+count = sys.argv[1] if len(sys.argv) > 1 else "100000"
+here = os.path.dirname(os.path.abspath(__file__))
+for name, storage, slots in (("journal", "journal", "0"),
+                             ("journal, slots", "journal", "1"),
+                             ("columnar", "columnar", "0")):
+    with tempfile.TemporaryDirectory() as tmp:
+        # No journal compaction, which would run during the measures
+        env = dict(os.environ, MODELS_STORAGE=storage, MODELS_SLOTS=slots,
+                   PYTHONPATH=here, MODELS_DURABILITY="async",
+                   MODELS_JOURNAL_COMPACT=str(10 ** 9))
+        subprocess.run([sys.executable, os.path.join(here, "main_12.py"),
+                        name, count], cwd=tmp, env=env, check=True)
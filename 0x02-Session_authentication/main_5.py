@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+""" Main 5
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+if len(sys.argv) > 2:
+    from models.user import User
+
+    User.load_from_file()
+    count = int(sys.argv[2])
+    start = time.perf_counter()
+    for i in range(count):
+        user = User()
+        user.email = "user{}@hbtn.io".format(i)
+        user.password = "pwd{}".format(i)
+        user.save()
+    elapsed = time.perf_counter() - start
+    print("{}: {} creates in {:.2f}s".format(sys.argv[1], count, elapsed))
+    target = int(sys.argv[3])
+    if target > count:
+        # Each save rewrites all the users saved so far
+        print("{}: ~{:.0f}s for {} creates, extrapolated (quadratic)".format(
+            sys.argv[1], elapsed * (target / count) ** 2, target))
+    sys.exit(0)
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+# File mode is O(N^2), larger runs take hours
+FILE_MODE_MAX = 1000
+here = os.path.dirname(os.path.abspath(__file__))
+for storage in ("journal", "file"):
+    run = count if storage != "file" else min(count, FILE_MODE_MAX)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, MODELS_STORAGE=storage, PYTHONPATH=here)
+        subprocess.run([sys.executable, os.path.join(here, "main_5.py"),
+                        storage, str(run), str(count)], cwd=tmp, env=env,
+                       check=True)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+""" Main 6
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+if len(sys.argv) > 2:
+    start = time.perf_counter()
+    from models.user import User
+
+    User.load_from_file()
+    loaded = time.perf_counter()
+    count = User.count()
+    user = User.get(sys.argv[2])
+    print("lazy={}: load {:.2f}s, count {} + get {} in {:.4f}s".format(
+        os.environ["MODELS_LAZY_LOAD"], loaded - start, count,
+        user.email, time.perf_counter() - loaded))
+    sys.exit(0)
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+here = os.path.dirname(os.path.abspath(__file__))
+with tempfile.TemporaryDirectory() as tmp:
+    objs_json = {}
+    for i in range(count):
+        obj_id = str(uuid.uuid4())
+        objs_json[obj_id] = {
+            "id": obj_id, "created_at": "2024-08-14T10:00:00",
+            "updated_at": "2024-08-14T10:00:00",
+            "email": "user{}@hbtn.io".format(i), "_password": None,
+            "first_name": None, "last_name": None}
+    with open(os.path.join(tmp, ".db_User.json"), "w") as f:
+        json.dump(objs_json, f)
+    for lazy in ("0", "1"):
+        env = dict(os.environ, MODELS_LAZY_LOAD=lazy, PYTHONPATH=here)
+        subprocess.run([sys.executable, os.path.join(here, "main_6.py"),
+                        "load", obj_id], cwd=tmp, env=env, check=True)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+""" Main 7
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from models.user import User
+
+users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+os.chdir(tempfile.mkdtemp())
+User.load_from_file()
+with User.transaction():
+    for i in range(users):
+        user = User()
+        user.email = "user{}@hbtn.io".format(i)
+        user.save()
+ids = [user.id for user in User.all()]
+
+
+def read(locked: bool):
+    """ One read: a get, an email search and a count
+    """
+    user_id = random.choice(ids)
+    email = "user{}@hbtn.io".format(random.randrange(users))
+    if locked:
+        with User._lock():
+            User.get(user_id)
+            User.search({'email': email})
+            User.count()
+    else:
+        User.get(user_id)
+        User.search({'email': email})
+        User.count()
+
+
+def run(locked: bool, readers: int = 4, writers: int = 2) -> tuple:
+    """ Reads and writes done by concurrent threads in duration seconds
+    """
+    stop = threading.Event()
+    counts = [0] * (readers + writers)
+
+    def reader(n):
+        while not stop.is_set():
+            read(locked)
+            counts[n] += 1
+
+    def writer(n):
+        while not stop.is_set():
+            user = User.get(random.choice(ids))
+            user.first_name = "name{}".format(counts[n])
+            user.save()
+            counts[n] += 1
+
+    threads = [threading.Thread(target=reader, args=(n,))
+               for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,))
+                for n in range(readers, readers + writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts[:readers]), sum(counts[readers:])
+
+
+for locked in (True, False):
+    reads, writes = run(locked)
+    print("{}: {:.0f} reads/s, {:.0f} writes/s".format(
+        "reads behind the store lock" if locked else "lock-free reads",
+        reads / duration, writes / duration))
+
+
+def create(n):
+    """ Concurrent creates: the email index and the file must hold them all
+    """
+    for i in range(200):
+        user = User()
+        user.email = "race{}@hbtn.io".format(i)
+        user.save()
+
+
+threads = [threading.Thread(target=create, args=(n,)) for n in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+indexed = sum(len(User.search({'email': "race{}@hbtn.io".format(i)}))
+              for i in range(200))
+in_memory = User.count()
+User.load_from_file()
+print("concurrent creates: {} of 1600 indexed, {} users in memory, "
+      "{} after reloading".format(indexed, in_memory, User.count()))
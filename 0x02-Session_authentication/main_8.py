@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+""" Main 8
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+if len(sys.argv) > 3:
+    from models.user import User
+
+    User.load_from_file()
+    worker, count = sys.argv[2], int(sys.argv[3])
+    start = time.perf_counter()
+    for i in range(count):
+        user = User()
+        user.email = "user{}-{}@hbtn.io".format(worker, i)
+        user.save()
+    saved = time.perf_counter()
+    for i in range(count):
+        User.search({'email': "user{}-{}@hbtn.io".format(worker, i)})
+    print("{} worker {}: {:.0f} saves/s, {:.0f} searches/s, "
+          "sees {} users".format(sys.argv[1], worker,
+                                 count / (saved - start),
+                                 count / (time.perf_counter() - saved),
+                                 User.count()))
+    sys.exit(0)
+
+workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+count = sys.argv[2] if len(sys.argv) > 2 else "500"
+here = os.path.dirname(os.path.abspath(__file__))
+for storage in ("journal", "sqlite"):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, MODELS_STORAGE=storage, PYTHONPATH=here)
+        procs = [subprocess.Popen([sys.executable,
+                                   os.path.join(here, "main_8.py"),
+                                   storage, str(n), count],
+                                  cwd=tmp, env=env)
+                 for n in range(workers)]
+        for proc in procs:
+            proc.wait()
+        subprocess.run([sys.executable, "-c",
+                        "from models.user import User; "
+                        "User.load_from_file(); "
+                        "print('{}: {} users after restart'.format("
+                        "'" + storage + "', User.count()))"],
+                       cwd=tmp, env=env, check=True)
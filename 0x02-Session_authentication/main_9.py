@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+""" Main 9
+"""
+import sys
+import threading
+import time
+from api.v1.auth.session_store import SessionStore
+
+threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+duration = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+ttl = 0.5
+
+
+def run(sessions, create) -> int:
+    """ Logins, each followed by 4 session reads, in duration seconds
+    """
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def worker(n):
+        i = 0
+        while not stop.is_set():
+            session_id = "{}-{}".format(n, i)
+            create(sessions, session_id)
+            for _ in range(4):
+                sessions.get(session_id)
+            i += 1
+        counts[n] = i
+
+    workers = [threading.Thread(target=worker, args=(n,))
+               for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    return sum(counts)
+
+
+def dict_create(sessions, session_id):
+    sessions[session_id] = "user"
+
+
+def store_create(sessions, session_id):
+    sessions.set(session_id, "user", ttl)
+
+
+sessions = {}
+logins = run(sessions, dict_create)
+print("dict: {:.0f} logins/s, {} sessions kept".format(
+    logins / duration, len(sessions)))
+store = SessionStore(max_size=100000)
+logins = run(store, store_create)
+print("store: {:.0f} logins/s".format(logins / duration))
+time.sleep(2 * store.sweep_interval)
+print("store after {}s TTL: {}".format(ttl, store.stats()))
@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+""" Store module
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterator, List, TypeVar
+from os import getenv, path
+from models.columnar import Table
+from models.journal import Journal
+from models.writer import GroupWriter
+import atexit
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class Store(ABC):
+    """ Storage backend keeping the objects instead of DATA
+
+    Unlike the built-in file and journal storage, a store keeps no live
+    objects: every read builds them from the backend, so changes to an
+    object only count once it is saved. Backends implement every abstract
+    method, or fail to instantiate.
+    """
+
+    def __init__(self, durability: str = 'sync'):
+        """ Initialize the store
+        """
+        self.durability = durability
+
+    @abstractmethod
+    def prepare(self, cls):
+        """ Create the storage of a class if needed
+        """
+
+    @abstractmethod
+    def get(self, cls, obj_id: str) -> TypeVar('Base'):
+        """ Return one object by ID, None if not found
+        """
+
+    @abstractmethod
+    def search(self, cls, attributes: dict) -> List[TypeVar('Base')]:
+        """ Return all objects with matching attributes
+        """
+
+    @abstractmethod
+    def page(self, cls, after: str, limit: int) -> List[TypeVar('Base')]:
+        """ Return up to limit objects ordered by ID, after the ID after
+        if not None
+        """
+
+    @abstractmethod
+    def count(self, cls) -> int:
+        """ Count all objects of a class
+        """
+
+    @abstractmethod
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or update an object
+        """
+
+    @abstractmethod
+    def remove(self, obj: TypeVar('Base')):
+        """ Remove an object
+        """
+
+    @abstractmethod
+    def version(self, cls) -> int:
+        """ Counter that changes whenever an object of the class changes
+        """
+
+    @abstractmethod
+    def store_id(self) -> str:
+        """ ID of the stored data, the same for every process using it
+        and new if the store is recreated
+        """
+
+    def flush(self):
+        """ Write every change still buffered
+        """
+
+    @contextmanager
+    @abstractmethod
+    def transaction(self) -> Iterator[None]:
+        """ Apply every save and remove of the block atomically
+        """
+
+
+class SQLiteStore(Store):
+    """ Store in one SQLite database, in WAL mode
+
+    Each class gets a table with one column per attribute, the ID as
+    primary key and an index per Base.indexes entry (UNIQUE for unique
+    ones). Connections are per thread and per process; SQL is generated
+    once per class and bound with parameters, so sqlite3 reuses its
+    prepared statements. Writes take the database write lock up front
+    (BEGIN IMMEDIATE) and wait up to timeout seconds for other writers.
+    """
+
+    def __init__(self, durability: str = 'sync', db_path: str = None,
+                 timeout: float = None):
+        """ Initialize the store, the database is opened on first use
+        """
+        super().__init__(durability)
+        self.db_path = db_path or getenv('MODELS_SQLITE_PATH',
+                                         '.db.sqlite3')
+        if timeout is None:
+            timeout = float(getenv('MODELS_SQLITE_TIMEOUT', 30))
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sql = {}
+        self._store_id = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the current thread and process
+        """
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # Connections must not cross a fork
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                                   isolation_level=None,
+                                   cached_statements=256)
+            self._wal(conn)
+            # In WAL mode NORMAL only risks the last commits on power loss
+            conn.execute("PRAGMA synchronous={}".format(
+                "FULL" if self.durability == 'sync' else "NORMAL"))
+            local.conn = conn
+            local.pid = os.getpid()
+            local.depth = 0
+        return local.conn
+
+    def _wal(self, conn: sqlite3.Connection):
+        """ Switch the database to WAL mode
+
+        The switch needs an exclusive lock and does not wait for busy
+        connections, so it is retried until timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()
+                if mode[0] == 'wal':
+                    return
+            except sqlite3.OperationalError:
+                if time.monotonic() > deadline:
+                    raise
+            time.sleep(0.01)
+
+    def _columns(self, cls) -> tuple:
+        """ Columns of the table of a class
+        """
+        return ('id', 'created_at', 'updated_at') + cls._fields
+
+    def _create(self, cls, quoted: list):
+        """ Create the table and indexes of a class, or add new columns
+        """
+        table = '"{}"'.format(cls.__name__)
+        conn = self._connection()
+        # Serialized with other processes creating the same schema
+        own = not conn.in_transaction
+        if own:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS _versions "
+                         "(class TEXT PRIMARY KEY, version INTEGER)")
+            conn.execute("CREATE TABLE IF NOT EXISTS {} "
+                         "(id TEXT PRIMARY KEY)".format(table))
+            existing = {row[1] for row in
+                        conn.execute("PRAGMA table_info({})".format(table))}
+            for column in quoted:
+                if column.strip('"') not in existing:
+                    conn.execute("ALTER TABLE {} ADD COLUMN {}".format(
+                        table, column))
+            for attr, unique in cls.indexes.items():
+                conn.execute(
+                    'CREATE {}INDEX IF NOT EXISTS "{}_{}" ON {} ("{}")'.format(
+                        "UNIQUE " if unique else "", cls.__name__, attr,
+                        table, attr))
+        except Exception:
+            if own:
+                conn.execute("ROLLBACK")
+            raise
+        if own:
+            conn.execute("COMMIT")
+
+    def _statements(self, cls) -> dict:
+        """ SQL of a class, creating its table and indexes on first use
+        """
+        sql = self._sql.get(cls)
+        if sql is not None:
+            return sql
+        with self._lock:
+            if cls in self._sql:
+                return self._sql[cls]
+            table = '"{}"'.format(cls.__name__)
+            columns = self._columns(cls)
+            quoted = ['"{}"'.format(column) for column in columns]
+            self._create(cls, quoted)
+            sql = {
+                'select': "SELECT {} FROM {}".format(", ".join(quoted),
+                                                     table),
+                'count': "SELECT COUNT(*) FROM {}".format(table),
+                'page': "SELECT {} FROM {} WHERE id > ? ORDER BY id "
+                        "LIMIT ?".format(", ".join(quoted), table),
+                'upsert': "INSERT INTO {} ({}) VALUES ({}) "
+                          "ON CONFLICT(id) DO UPDATE SET {}".format(
+                              table, ", ".join(quoted),
+                              ", ".join("?" * len(quoted)),
+                              ", ".join("{0} = excluded.{0}".format(column)
+                                        for column in quoted[1:])),
+                'delete': "DELETE FROM {} WHERE id = ?".format(table),
+                'where': {},
+            }
+            self._sql[cls] = sql
+        return sql
+
+    def _build(self, cls, row: tuple) -> TypeVar('Base'):
+        """ Object of a class from a row of its table
+        """
+        obj = cls.__new__(cls)
+        setter = object.__setattr__
+        for column, value in zip(self._columns(cls), row):
+            if column == 'created_at' or column == 'updated_at':
+                column = '_' + column
+            setter(obj, column, value)
+        return obj
+
+    def _bump(self, conn: sqlite3.Connection, cls):
+        """ Change the version of a class, in the current transaction
+        """
+        conn.execute("INSERT INTO _versions VALUES (?, 1) ON CONFLICT(class) "
+                     "DO UPDATE SET version = version + 1", (cls.__name__,))
+
+    def prepare(self, cls):
+        """ Create the table and indexes of a class if needed
+        """
+        self._statements(cls)
+
+    def get(self, cls, obj_id: str) -> TypeVar('Base'):
+        """ Return one object by ID, None if not found
+        """
+        return next(iter(self.search(cls, {'id': obj_id})), None)
+
+    def search(self, cls, attributes: dict) -> List[TypeVar('Base')]:
+        """ Return all objects with matching attributes
+
+        Attributes stored in columns are matched in SQL, any other one
+        (e.g. a property) on the loaded objects.
+        """
+        sql = self._statements(cls)
+        columns = self._columns(cls)
+        where = []
+        params = []
+        others = {}
+        for k, v in attributes.items():
+            if k in columns and (v is None or
+                                 isinstance(v, (str, int, float, bytes))):
+                where.append(k)
+                params.append(v)
+            else:
+                others[k] = v
+        key = tuple(where)
+        query = sql['where'].get(key)
+        if query is None:
+            query = sql['select']
+            if where:
+                query += " WHERE " + " AND ".join(
+                    '"{}" IS ?'.format(k) for k in where)
+            sql['where'][key] = query
+        rows = self._connection().execute(query, params).fetchall()
+        objs = [self._build(cls, row) for row in rows]
+        return [obj for obj in objs
+                if all(getattr(obj, k) == v for k, v in others.items())]
+
+    def page(self, cls, after: str, limit: int) -> List[TypeVar('Base')]:
+        """ Return up to limit objects ordered by ID, after the ID after
+        if not None, walking the primary key index
+        """
+        sql = self._statements(cls)
+        rows = self._connection().execute(
+            sql['page'], (after or '', limit)).fetchall()
+        return [self._build(cls, row) for row in rows]
+
+    def count(self, cls) -> int:
+        """ Count all objects of a class
+        """
+        sql = self._statements(cls)
+        return self._connection().execute(sql['count']).fetchone()[0]
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or update an object
+
+        Raise ValueError if a unique indexed attribute is already taken.
+        """
+        cls = obj.__class__
+        sql = self._statements(cls)
+        values = [obj.id, obj._created_at, obj._updated_at]
+        values.extend(getattr(obj, field, None) for field in cls._fields)
+        with self.transaction():
+            conn = self._connection()
+            try:
+                conn.execute(sql['upsert'], values)
+            except sqlite3.IntegrityError as e:
+                attr = str(e).rsplit(".", 1)[-1]
+                raise ValueError("{} {} already exists".format(
+                    attr, getattr(obj, attr, None))) from e
+            self._bump(conn, cls)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Remove an object
+        """
+        cls = obj.__class__
+        sql = self._statements(cls)
+        with self.transaction():
+            conn = self._connection()
+            if conn.execute(sql['delete'], (obj.id,)).rowcount:
+                self._bump(conn, cls)
+
+    def version(self, cls) -> int:
+        """ Counter that changes whenever an object of the class changes
+        """
+        self._statements(cls)
+        row = self._connection().execute(
+            "SELECT version FROM _versions WHERE class = ?",
+            (cls.__name__,)).fetchone()
+        return row[0] if row else 0
+
+    def store_id(self) -> str:
+        """ ID of the database, drawn by the first process to ask for it
+        """
+        if self._store_id is None:
+            conn = self._connection()
+            conn.execute("CREATE TABLE IF NOT EXISTS _meta "
+                         "(key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("INSERT OR IGNORE INTO _meta VALUES ('id', ?)",
+                         (uuid.uuid4().hex,))
+            self._store_id = conn.execute(
+                "SELECT value FROM _meta WHERE key = 'id'").fetchone()[0]
+        return self._store_id
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """ Apply every save and remove of the block in one commit
+
+        Nested transactions join the outermost one. As with the built-in
+        storage, changes made before an error are kept.
+        """
+        conn = self._connection()
+        local = self._local
+        if local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        local.depth += 1
+        try:
+            yield
+        finally:
+            local.depth -= 1
+            if local.depth == 0:
+                conn.execute("COMMIT")
+
+
+class ColumnarStore(Store):
+    """ Store keeping each class in a columnar, array-backed Table
+
+    Rows take several times less memory than objects in DATA (see
+    main_12.py), at the price of building an object on every read. The
+    data is persisted in the format of the journal storage, and stays
+    private to the process. Changes are written by a group writer: save()
+    and remove() return once written, unless in async durability.
+    """
+
+    def __init__(self, durability: str = 'sync'):
+        """ Initialize the store, a class is loaded on first use
+        """
+        super().__init__(durability)
+        self.compact_threshold = int(getenv('MODELS_JOURNAL_COMPACT',
+                                            10000))
+        self._tables = {}
+        self._journals = {}
+        self._versions = {}
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._id = uuid.uuid4().hex
+        # Journals are only written by the writer thread, never under a
+        # table lock, as compaction takes the table lock for a snapshot
+        self._writer = GroupWriter(self._write,
+                                   float(getenv('MODELS_FLUSH_INTERVAL',
+                                                0.1)),
+                                   int(getenv('MODELS_FLUSH_THRESHOLD',
+                                              1000)))
+        atexit.register(self._writer.flush)
+
+    def _table(self, cls) -> Table:
+        """ Table of a class, loaded from its files on first use
+        """
+        table = self._tables.get(cls)
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._tables.get(cls)
+            if table is None:
+                table = Table(cls._fields, cls.indexes)
+                self._load(cls, table)
+                self._tables[cls] = table
+        return table
+
+    def _load(self, cls, table: Table):
+        """ Fill a table from the snapshot and journal of its class
+        """
+        journal = self._journal(cls)
+        if path.exists(journal.snapshot_path):
+            with open(journal.snapshot_path, 'r') as f:
+                for obj_json in json.load(f).values():
+                    table.put(cls(**obj_json))
+        for record in journal.records():
+            if record["op"] == "remove":
+                table.delete(record["id"])
+            else:
+                table.put(cls(**record["obj"]))
+
+    def _journal(self, cls) -> Journal:
+        """ Journal of a class
+        """
+        journal = self._journals.get(cls)
+        if journal is None:
+            journal = self._journals.setdefault(
+                cls, Journal(cls.__name__, self.compact_threshold))
+        return journal
+
+    def _build(self, cls, table: Table, row: int,
+               obj_id: str = None) -> TypeVar('Base'):
+        """ Object of a class from a row of its table, reusing its ID if
+        known
+        """
+        obj = cls.__new__(cls)
+        setter = object.__setattr__
+        setter(obj, 'id', table.ids.get(row) if obj_id is None else obj_id)
+        for name, column in table.columns.items():
+            setter(obj, name, column.get(row))
+        return obj
+
+    def _write(self, cls, records: list):
+        """ Append records to the journal of a class, in the writer thread
+        """
+        self._journal(cls).append(records, lambda: self._snapshot(cls))
+
+    def _snapshot(self, cls) -> dict:
+        """ JSON of all objects of a class, from a copy of its table
+        """
+        table = self._table(cls)
+        with table.lock:
+            table = table.copy()
+        snapshot = {}
+        for row in table.rows():
+            obj = self._build(cls, table, row)
+            snapshot[obj.id] = obj.to_json(True)
+        return snapshot
+
+    def _persist(self, cls, record: dict) -> int:
+        """ Queue a change, under the table lock so changes are written in
+        the order they were made; return the writer batch holding it
+        """
+        pending = getattr(self._local, 'pending', None)
+        if pending is not None:
+            pending.setdefault(cls, []).append(record)
+            return None
+        return self._writer.add(cls, record,
+                                reserve=self.durability != 'async')
+
+    def _wait(self, batch: int):
+        """ Wait until a writer batch is written, unless in async
+        durability
+        """
+        if batch is not None and self.durability != 'async':
+            self._writer.wait(batch, reserved=True)
+
+    def _bump(self, cls):
+        """ Change the version of a class
+        """
+        self._versions[cls] = next(self._counter)
+
+    def prepare(self, cls):
+        """ Load a class if needed
+        """
+        self._table(cls)
+
+    def get(self, cls, obj_id: str) -> TypeVar('Base'):
+        """ Return one object by ID, None if not found
+        """
+        table = self._table(cls)
+        with table.lock:
+            row = table.row(obj_id)
+            return (None if row < 0
+                    else self._build(cls, table, row, obj_id))
+
+    def search(self, cls, attributes: dict) -> List[TypeVar('Base')]:
+        """ Return all objects with matching attributes
+
+        The first attribute stored in a column narrows the rows, through
+        its index if any; every attribute is then matched on the objects.
+        """
+        table = self._table(cls)
+        with table.lock:
+            rows = None
+            for k, v in attributes.items():
+                if k == 'id' or k in table.columns:
+                    rows = table.find(k, v)
+                    break
+            if rows is None:
+                rows = table.rows()
+            objs = [self._build(cls, table, row) for row in rows]
+        return [obj for obj in objs
+                if all(getattr(obj, k) == v for k, v in attributes.items())]
+
+    def page(self, cls, after: str, limit: int) -> List[TypeVar('Base')]:
+        """ Return up to limit objects ordered by ID, after the ID after
+        if not None
+        """
+        table = self._table(cls)
+        with table.lock:
+            return [self._build(cls, table, row)
+                    for row in table.page(after, limit)]
+
+    def count(self, cls) -> int:
+        """ Count all objects of a class
+        """
+        return len(self._table(cls))
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or update an object
+
+        Raise ValueError if a unique indexed attribute is already taken.
+        """
+        cls = obj.__class__
+        table = self._table(cls)
+        record = {"op": "save", "obj": obj.to_json(True)}
+        with table.lock:
+            table.put(obj)
+            self._bump(cls)
+            batch = self._persist(cls, record)
+        self._wait(batch)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Remove an object
+        """
+        cls = obj.__class__
+        table = self._table(cls)
+        batch = None
+        with table.lock:
+            if table.delete(obj.id):
+                self._bump(cls)
+                batch = self._persist(cls, {"op": "remove", "id": obj.id})
+        self._wait(batch)
+
+    def version(self, cls) -> int:
+        """ Counter that changes whenever an object of the class changes
+        """
+        return self._versions.get(cls, 0)
+
+    def store_id(self) -> str:
+        """ ID of this process's tables
+        """
+        return self._id
+
+    def flush(self):
+        """ Write every change queued to the writer
+        """
+        self._writer.flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """ Queue every save and remove of the block as one write per class
+
+        Changes are applied in memory as they happen and queued when the
+        outermost transaction of the thread ends.
+        """
+        if getattr(self._local, 'pending', None) is not None:
+            yield
+            return
+        self._local.pending = {}
+        try:
+            yield
+        finally:
+            pending = self._local.pending
+            self._local.pending = None
+            for cls, records in pending.items():
+                with self._table(cls).lock:
+                    batch = self._writer.add_many(
+                        cls, records, reserve=self.durability != 'async')
+                self._wait(batch)
+
+
+# Backends selected with MODELS_STORAGE, besides "file" and "journal"
+STORES = {
+    'sqlite': SQLiteStore,
+    'columnar': ColumnarStore,
+}
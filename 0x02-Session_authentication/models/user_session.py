@@ -3,7 +3,7 @@
 UserSession model for storing session data in the database.
 """
 
-from models.base import Base
+from models.base import Base, SLOTS
 import models
 from uuid import uuid4
 from datetime import datetime
@@ -13,6 +13,11 @@ class UserSession(Base):
     """
     UserSession class to store user_id and session_id.
     """
+    attributes = ('user_id', 'session_id')
+    if SLOTS:
+        __slots__ = attributes
+    indexes = {'session_id': True}
+
     def __init__(self, *args: list, **kwargs: dict):
         """
         Initialize a UserSession instance.
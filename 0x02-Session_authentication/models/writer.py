@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+""" Writer module
+"""
+from typing import Callable
+import threading
+
+
+class GroupWriter():
+    """ Background writer that persists queued changes in batches
+
+    Changes are queued per class and written with one write_fn(cls,
+    records) call per class and batch, every interval seconds or as soon
+    as threshold changes are queued. Callers may instead wait until the
+    batch holding their change is on disk (group commit): the writer then
+    flushes right away, and every change queued while a batch is being
+    written goes into the next one.
+    """
+
+    def __init__(self, write_fn: Callable, interval: float = 1.0,
+                 threshold: int = 1000):
+        """ Initialize the writer, its thread starts on first use
+        """
+        self.write_fn = write_fn
+        self.interval = interval
+        self.threshold = threshold
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._count = 0
+        self._taken = 0
+        self._done = 0
+        self._waiters = 0
+        # Batch -> number of callers yet to read its outcome, and write
+        # errors of the batches such callers wait on
+        self._waiting = {}
+        self._errors = {}
+        self._thread = None
+
+    def add(self, cls, record, wait: bool = False,
+            reserve: bool = False) -> int:
+        """ Queue a change, optionally waiting until it is written
+        """
+        return self.add_many(cls, [record], wait, reserve)
+
+    def add_many(self, cls, records: list, wait: bool = False,
+                 reserve: bool = False) -> int:
+        """ Queue changes of a class, optionally waiting until written
+
+        Return the number of the batch holding the changes, to wait() on.
+        With reserve, the caller must then call wait(batch, reserved=True),
+        and the batch keeps its write error until it does.
+        """
+        with self._cond:
+            self._pending.setdefault(cls, []).extend(records)
+            self._count += len(records)
+            batch = self._taken + 1
+            if wait or reserve:
+                self._waiting[batch] = self._waiting.get(batch, 0) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                daemon=True)
+                self._thread.start()
+            if self._count >= self.threshold:
+                self._cond.notify_all()
+        if wait:
+            self.wait(batch, reserved=True)
+        return batch
+
+    def wait(self, batch: int, reserved: bool = False):
+        """ Wait until a batch is written, raising its write error
+
+        The error is only kept while callers wait on the batch, so a
+        caller that did not reserve it may miss an error raised before
+        it started waiting.
+        """
+        with self._cond:
+            if not reserved:
+                self._waiting[batch] = self._waiting.get(batch, 0) + 1
+            self._waiters += 1
+            self._cond.notify_all()
+            while self._done < batch:
+                self._cond.wait()
+            self._waiters -= 1
+            left = self._waiting.pop(batch) - 1
+            if left:
+                self._waiting[batch] = left
+                error = self._errors.get(batch)
+            else:
+                error = self._errors.pop(batch, None)
+        if error is not None:
+            raise error
+
+    def flush(self):
+        """ Write every queued change now
+
+        Changes of a batch that fails to be written are queued again.
+        """
+        with self._flush_lock:
+            with self._cond:
+                pending = self._pending
+                self._pending = {}
+                self._count = 0
+                self._taken += 1
+            error = None
+            try:
+                for cls, records in pending.items():
+                    self.write_fn(cls, records)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                with self._cond:
+                    self._done += 1
+                    if error is not None:
+                        if self._waiting.get(self._done):
+                            self._errors[self._done] = error
+                        for cls, records in pending.items():
+                            queued = self._pending.get(cls, [])
+                            self._pending[cls] = records + queued
+                            self._count += len(records)
+                    self._cond.notify_all()
+
+    def _due(self) -> bool:
+        """ Whether queued changes should be written now
+        """
+        return self._count > 0 and (self._waiters > 0 or
+                                    self._count >= self.threshold)
+
+    def _run(self):
+        """ Flush loop of the background thread
+        """
+        while True:
+            with self._cond:
+                self._cond.wait_for(self._due, timeout=self.interval)
+                if not self._pending:
+                    continue
+            try:
+                self.flush()
+            except Exception:
+                # Raised to waiting callers, retried on the next round
+                pass
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+import logging
+import statistics
+import sys
+import threading
+import time
+
+from app import app, AUTH
+
+logging.disable(logging.CRITICAL)
+
+EMAIL = "bob@bob.com"
+PASSWORD = "MyPwdOfBob"
+DURATION = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+LOGIN_THREADS = 16
+
+AUTH.register_user(EMAIL, PASSWORD)
+AUTH.register_user("alice@alice.com", PASSWORD)
+session_id = AUTH.create_session("alice@alice.com")
+client = app.test_client()
+stop = threading.Event()
+statuses = {}
+lock = threading.Lock()
+
+
+def login_storm() -> None:
+    """POST /sessions in a loop"""
+    local = app.test_client()
+    while not stop.is_set():
+        status = local.post("/sessions", data={"email": EMAIL,
+                                               "password": PASSWORD}
+                            ).status_code
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+
+
+threads = [threading.Thread(target=login_storm)
+           for _ in range(LOGIN_THREADS)]
+for thread in threads:
+    thread.start()
+
+latencies = []
+deadline = time.perf_counter() + DURATION
+client.set_cookie("session_id", session_id)
+while time.perf_counter() < deadline:
+    start = time.perf_counter()
+    client.get("/profile")
+    latencies.append((time.perf_counter() - start) * 1000)
+stop.set()
+for thread in threads:
+    thread.join()
+
+print("POST /sessions statuses: {}".format(statuses))
+print("GET /profile: {} requests, p50 {:.2f} ms, p99 {:.2f} ms".format(
+    len(latencies), statistics.median(latencies),
+    statistics.quantiles(latencies, n=100)[98]))
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+import logging
+import sys
+import time
+
+from sqlalchemy import event
+from app import app, AUTH
+
+logging.disable(logging.CRITICAL)
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+queries = []
+event.listen(AUTH._db._engine, "before_cursor_execute",
+             lambda *args: queries.append(1))
+
+AUTH.register_user("bob@bob.com", "MyPwdOfBob")
+client = app.test_client()
+client.set_cookie("session_id", AUTH.create_session("bob@bob.com"))
+
+for ttl in (0, 5):
+    AUTH._session_cache.ttl = ttl
+    queries.clear()
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        assert client.get("/profile").status_code == 200
+    elapsed = time.perf_counter() - start
+    print("session cache TTL {}s: {:.0f} us/request, {} queries".format(
+        ttl, 1e6 * elapsed / REQUESTS, len(queries)))
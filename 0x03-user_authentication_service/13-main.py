@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Main file
+"""
+import logging
+import os
+
+from app import app, AUTH
+from auth import Auth, _hash_password
+from encrypt_password import get_rounds
+from hasher import HasherBusy
+
+logging.disable(logging.CRITICAL)
+
+EMAIL = "bob@bob.com"
+PASSWORD = "MyPwdOfBob"
+
+
+def set_policy(rounds: str) -> None:
+    """Changes the bcrypt cost policy"""
+    os.environ["BCRYPT_ROUNDS"] = rounds
+    get_rounds.cache_clear()
+
+
+def login(password: str = PASSWORD) -> None:
+    """Logs in and prints the status and the stored hash cost"""
+    response = client.post("/sessions",
+                           data={"email": EMAIL, "password": password})
+    AUTH._db.close_session()
+    cost = AUTH._db.find_user_by(email=EMAIL).hashed_password.split("$")[2]
+    print("BCRYPT_ROUNDS={}: {}, stored cost {}".format(
+        os.environ["BCRYPT_ROUNDS"], response.status_code, cost))
+
+
+def busy_run(func, *args):
+    """Runs password checks, but finds no room to hash"""
+    if func is _hash_password:
+        raise HasherBusy("Password hashing is saturated")
+    return run(func, *args)
+
+
+client = app.test_client()
+set_policy("4")
+AUTH.register_user(EMAIL, PASSWORD)
+login()
+set_policy("5")
+login()
+login("wrong password")
+
+set_policy("6")
+run = AUTH._hasher.run
+AUTH._hasher.run = busy_run
+login()
+AUTH._hasher.run = run
+login()
+
+set_policy("32")
+login()
+try:
+    Auth()
+except ValueError as e:
+    print("Auth():", e)
@@ -2,11 +2,26 @@
 """Basic Flask App"""
 from flask import Flask, request, jsonify, redirect,  abort
 from auth import Auth
+from hasher import HasherBusy
 
 app = Flask(__name__)
 AUTH = Auth()
 
 
+@app.errorhandler(HasherBusy)
+def hasher_busy(error):
+    """Fails fast with 503 when password hashing is saturated"""
+    response = jsonify({"message": "Service unavailable"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+@app.teardown_appcontext
+def close_db_session(exception) -> None:
+    """Releases the database session of the request's thread"""
+    AUTH._db.close_session()
+
+
 @app.route("/", methods=["GET"], strict_slashes=False)
 def home():
     """Returns a JSON response with a welcome message"""
@@ -1,29 +1,102 @@
 #!/usr/bin/env python3
 """Authentication file"""
 from db import DB
+from encrypt_password import get_rounds, hash_password, needs_rehash
+from flask import g, has_request_context
+from hasher import HasherBusy, PasswordHasher
+from session_cache import SessionCache
 from user import User
 from sqlalchemy.orm.exc import NoResultFound
-from bcrypt import hashpw, gensalt, checkpw
-import bcrypt
+from bcrypt import checkpw
 import uuid
 
 
+def _hash_password(password: str) -> bytes:
+    """
+    Hashes a password using bcrypt at the policy cost.
+    Args:
+        password (str): The password to be hashed.
+    Returns:
+        bytes: The hashed password as bytes.
+    """
+    return hash_password(password)
+
+
+def _detached(user: User) -> User:
+    """
+    Copies the columns of a user into a User bound to no DB session, so
+    reading it never queries the database.
+    Args:
+        user (User): The user loaded from the database.
+    Returns:
+        User: The copy.
+    """
+    return User(**{column.name: getattr(user, column.name)
+                   for column in User.__table__.columns})
+
+
 class Auth:
     """Auth class to interact with the authentication database."""
 
     def __init__(self):
-        """Init"""
+        """Init
+        Raises:
+            ValueError: If the bcrypt cost policy is misconfigured.
+        """
+        get_rounds()
         self._db = DB()
+        self._hasher = PasswordHasher()
+        self._session_cache = SessionCache()
+
+    def _request_users(self) -> dict:
+        """
+        Returns the session ID -> user lookups of the current request.
+        Returns:
+            dict: The lookups, None outside of a request.
+        """
+        if not has_request_context():
+            return None
+        if 'session_users' not in g:
+            g.session_users = {}
+        return g.session_users
+
+    def _update_user(self, user_id: int, **kwargs) -> None:
+        """
+        Updates a user and drops the cached lookups of its sessions.
+        Args:
+            user_id (int): The ID of the user to update.
+            kwargs: The attributes to update.
+        """
+        self._db.update_user(user_id, **kwargs)
+        self._session_cache.invalidate_user(user_id)
+        if has_request_context():
+            g.pop('session_users', None)
 
     def _hash_password(self, password: str) -> bytes:
         """
-        Hashes a password using bcrypt.
+        Hashes a password using bcrypt, on the hashing pool.
         Args:
             password (str): The password to be hashed.
         Returns:
             bytes: The hashed password as bytes.
+        Raises:
+            HasherBusy: If the hashing pool is saturated.
+        """
+        return self._hasher.run(_hash_password, password)
+
+    def _check_password(self, password: str, hashed_password: str) -> bool:
+        """
+        Checks a password against a bcrypt hash, on the hashing pool.
+        Args:
+            password (str): The password to check.
+            hashed_password (str): The stored hash.
+        Returns:
+            bool: True if they match, False otherwise.
+        Raises:
+            HasherBusy: If the hashing pool is saturated.
         """
-        return hashpw(password.encode('utf-8'), gensalt())
+        return self._hasher.run(checkpw, password.encode('utf-8'),
+                                hashed_password.encode('utf-8'))
 
     def register_user(self, email: str, password: str) -> User:
         """
@@ -48,6 +121,8 @@ class Auth:
     def valid_login(self, email: str, password: str) -> bool:
         """
         Validates a user's login.
+        A valid password whose hash has an off-policy cost is rehashed, if
+        the hashing pool has room; otherwise on a later login.
         Args:
             email (str): The user's email.
             password (str): The user's password.
@@ -56,10 +131,19 @@ class Auth:
         """
         try:
             user = self._db.find_user_by(email=email)
-            return checkpw(password.encode('utf-8'),
-                           user.hashed_password.encode('utf-8'))
         except NoResultFound:
             return False
+        if not self._check_password(password, user.hashed_password):
+            return False
+        try:
+            if needs_rehash(user.hashed_password.encode('utf-8')):
+                hashed_password = self._hash_password(password)
+                self._update_user(
+                    user.id, hashed_password=hashed_password.decode('utf-8'))
+        except (ValueError, HasherBusy):
+            # The password is valid whether or not its hash is migrated
+            pass
+        return True
 
     def create_session(self, email: str) -> str:
         """
@@ -72,7 +156,7 @@ class Auth:
         try:
             user = self._db.find_user_by(email=email)
             session_id = str(uuid.uuid4())
-            self._db.update_user(user.id, session_id=session_id)
+            self._update_user(user.id, session_id=session_id)
             return session_id
         except NoResultFound:
             return None
@@ -80,18 +164,30 @@ class Auth:
     def get_user_from_session_id(self, session_id: str) -> User:
         """
         Retrieves a user based on the given session ID.
+        Lookups are cached for the request, and found users for a few
+        seconds across requests, so steady-state calls skip the database.
         Args:
             session_id (str): The session ID.
         Returns:
-            User: The User object if found, None otherwise.
+            User: A copy of the User, not bound to a DB session, if found,
+            None otherwise.
         """
         if session_id is None:
             return None
-        try:
-            user = self._db.find_user_by(session_id=session_id)
-            return user
-        except NoResultFound:
-            return None
+        request_users = self._request_users()
+        if request_users is not None and session_id in request_users:
+            return request_users[session_id]
+        user = self._session_cache.get(session_id)
+        if user is None:
+            generation = self._session_cache.generation()
+            try:
+                user = _detached(self._db.find_user_by(session_id=session_id))
+                self._session_cache.put(session_id, user, generation)
+            except NoResultFound:
+                user = None
+        if request_users is not None:
+            request_users[session_id] = user
+        return user
 
     def destroy_session(self, user_id: int) -> None:
         """
@@ -104,7 +200,7 @@ class Auth:
         try:
             user = self._db.find_user_by(id=user_id)
             if user:
-                self._db.update_user(user_id=user_id, session_id=None)
+                self._update_user(user_id, session_id=None)
         except NoResultFound:
             pass
 
@@ -121,7 +217,7 @@ class Auth:
         try:
             user = self._db.find_user_by(email=email)
             reset_token = str(uuid.uuid4())
-            self._db.update_user(user.id, reset_token=reset_token)
+            self._update_user(user.id, reset_token=reset_token)
             return reset_token
         except NoResultFound:
             raise ValueError("Email not registered")
@@ -143,10 +239,10 @@ class Auth:
             if not user:
                 raise ValueError("Invalid reset token")
             hashed_password = self._hash_password(password)
-            self._db.update_user(
-                    user.id,
-                    hashed_password=hashed_password.decode('utf-8'),
-                    reset_token=None
+            self._update_user(
+                user.id,
+                hashed_password=hashed_password.decode('utf-8'),
+                reset_token=None
             )
         except NoResultFound:
             raise ValueError("Invalid reset token")
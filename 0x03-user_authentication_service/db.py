@@ -3,7 +3,7 @@
 """
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.session import Session
 from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.orm.exc import NoResultFound
@@ -20,16 +20,20 @@ class DB:
         self._engine = create_engine("sqlite:///a.db", echo=True)
         Base.metadata.drop_all(self._engine)
         Base.metadata.create_all(self._engine)
-        self.__session = None
+        self.__session = scoped_session(sessionmaker(bind=self._engine))
 
     @property
     def _session(self) -> Session:
-        """Memoized session object
+        """Session object of the current thread, as a Session is not
+        safe to share between the threads serving requests
         """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        return self.__session()
+
+    def close_session(self) -> None:
+        """Close the session of the current thread, returning its
+        connection to the pool
+        """
+        self.__session.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """Add a new user to the database
@@ -41,7 +45,7 @@ class DB:
         """
         new_user = User(email=email, hashed_password=hashed_password)
         self._session.add(new_user)
-        self._session.commit()
+        self._commit()
         return new_user
 
     def find_user_by(self, **kwargs) -> User:
@@ -83,6 +87,16 @@ class DB:
                 if not hasattr(user, key):
                     raise ValueError(f"{key} is not an attribute of User")
                 setattr(user, key, value)
-            self._session.commit()
+            self._commit()
         except NoResultFound:
             raise ValueError("User not found")
+
+    def _commit(self) -> None:
+        """Commit the session of the current thread, rolling it back on
+        failure so the thread can keep using it
+        """
+        try:
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
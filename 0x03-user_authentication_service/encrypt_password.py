@@ -0,0 +1 @@
+../0x00-personal_data/encrypt_password.py
\ No newline at end of file
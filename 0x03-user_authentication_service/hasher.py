@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Bounded worker pool for password hashing"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+import os
+import threading
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool has no room for another job."""
+
+
+class PasswordHasher:
+    """Runs bcrypt calls on a bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so the pool caps how many
+    cores login traffic can take; once workers + max_pending jobs are in
+    flight, new jobs fail fast with HasherBusy instead of queueing.
+    """
+
+    def __init__(self, workers: int = None, max_pending: int = None) -> None:
+        """Initialize the pool, sized from HASHER_WORKERS and
+        HASHER_MAX_PENDING by default.
+        """
+        if workers is None:
+            workers = int(os.getenv('HASHER_WORKERS', os.cpu_count() or 1))
+        if max_pending is None:
+            max_pending = int(os.getenv('HASHER_MAX_PENDING', workers * 4))
+        self._executor = ThreadPoolExecutor(workers,
+                                            thread_name_prefix="hasher")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def run(self, func: Callable, *args) -> Any:
+        """
+        Runs func(*args) on the pool and waits for its result.
+        Args:
+            func (Callable): The hashing or checking function.
+            args: Its arguments.
+        Returns:
+            Any: What func returned.
+        Raises:
+            HasherBusy: If the pool is saturated.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy("Password hashing is saturated")
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
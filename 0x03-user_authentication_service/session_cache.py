@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Process-level cache of the user behind a session ID"""
+from collections import OrderedDict
+from typing import Any, Optional
+import os
+import threading
+import time
+
+
+class SessionCache:
+    """LRU cache, with a TTL, mapping session IDs to users.
+
+    Entries are dropped per user on every change to that user, and expire
+    after ttl seconds otherwise, which bounds how long a change made by
+    another process goes unseen. Every drop starts a new generation, so a
+    user read before a change can't be cached after it.
+    """
+
+    def __init__(self, ttl: float = None, max_size: int = None) -> None:
+        """Initialize the cache, sized from SESSION_CACHE_TTL and
+        SESSION_CACHE_SIZE by default.
+        """
+        if ttl is None:
+            ttl = float(os.getenv('SESSION_CACHE_TTL', 5))
+        if max_size is None:
+            max_size = int(os.getenv('SESSION_CACHE_SIZE', 10000))
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: str) -> Optional[Any]:
+        """
+        Retrieves the cached user of a session ID.
+        Args:
+            session_id (str): The session ID.
+        Returns:
+            Any: The user if cached and live, None otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._drop(session_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry[0]
+
+    def generation(self) -> int:
+        """
+        Returns the current generation, taken before reading a user to
+        cache.
+        Returns:
+            int: The generation, to pass to put.
+        """
+        return self._generation
+
+    def put(self, session_id: str, user: Any, generation: int = None) -> None:
+        """
+        Caches the user of a session ID, evicting the least recently used
+        entry when full.
+        Args:
+            session_id (str): The session ID.
+            user (Any): The user, with an id attribute.
+            generation (int): The generation from before the user was
+                read; the user isn't cached if a user was invalidated
+                since.
+        """
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._drop(session_id)
+            self._entries[session_id] = (user, time.monotonic() + self.ttl)
+            self._by_user.setdefault(user.id, set()).add(session_id)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Drops every cached session of a user.
+        Args:
+            user_id (int): The user's ID.
+        """
+        with self._lock:
+            self._generation += 1
+            for session_id in list(self._by_user.get(user_id, ())):
+                self._drop(session_id)
+
+    def _drop(self, session_id: str) -> None:
+        """Removes an entry, under the lock."""
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        session_ids = self._by_user.get(entry[0].id)
+        if session_ids is not None:
+            session_ids.discard(session_id)
+            if not session_ids:
+                del self._by_user[entry[0].id]